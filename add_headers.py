@@ -3,16 +3,48 @@
 Add standardized headers to all knowledge base markdown files
 """
 
+import functools
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from pathlib import Path
+
+# Serializes progress output when files are processed in parallel
+_print_lock = threading.Lock()
+
+# Compiled once at import so process_directory doesn't re-compile per file
+_FILENAME_RE = re.compile(r'(\d{8})_(\d{6})_(.+)\.md\Z')
+_HEADER_RE = re.compile(r'\A---\r?\n.*?\r?\n---\r?\n', re.DOTALL)
+_H1_RE = re.compile(r'^# (.+)$', re.MULTILINE)
+
+# Content keywords mapped to tags, matched in one pass over the sample
+_CONTENT_KEYWORD_TAGS = {
+    'privacy': 'privacy',
+    'transaction': 'transactions',
+    'proof': 'cryptography',
+    'contract': 'smart-contracts',
+    'validator': 'consensus',
+    'token': 'tokens',
+    'dapp': 'dapps'
+}
+_TAG_RE = re.compile('|'.join(_CONTENT_KEYWORD_TAGS))
+
+# Path components mapped to tags, checked via one set intersection
+_PATH_TAGS = {
+    'midnight': 'midnight',
+    'zk': 'zero-knowledge',
+    'zero-knowledge': 'zero-knowledge',
+    'privacy': 'privacy',
+    'blockchain': 'blockchain'
+}
+# Don't split on '-' so the 'zero-knowledge' component survives intact
+_PATH_SPLIT_RE = re.compile(r'[/_\s.]')
 
 def extract_metadata_from_filename(filename):
     """Extract date and title from filename pattern: YYYYMMDD_HHMMSS_Title.md"""
-    pattern = r'(\d{8})_(\d{6})_(.+)\.md$'
-    match = re.match(pattern, filename)
-    
+    match = _FILENAME_RE.match(filename)
+
     if match:
         date_str, time_str, title = match.groups()
         # Parse date and time
@@ -25,26 +57,15 @@ def extract_metadata_from_filename(filename):
 
 def extract_metadata_from_content(content):
     """Try to extract metadata from existing content"""
-    lines = content.split('\n')
-    
-    # Check if header already exists
-    if lines and lines[0].startswith('---'):
-        # Header might already exist
-        end_index = -1
-        for i, line in enumerate(lines[1:], 1):
-            if line.strip() == '---':
-                end_index = i
-                break
-        if end_index > 0:
-            return True, None  # Header exists
-    
+    # Check if header already exists - single C-level regex scan instead
+    # of splitting the whole file into a line list
+    if _HEADER_RE.match(content):
+        return True, None  # Header exists
+
     # Try to find title from first heading
-    title = None
-    for line in lines:
-        if line.startswith('# '):
-            title = line[2:].strip()
-            break
-    
+    match = _H1_RE.search(content)
+    title = match.group(1).strip() if match else None
+
     return False, title
 
 def create_header(date, time, title, doc_type, tags=None, status='active'):
@@ -64,60 +85,57 @@ tags: [{', '.join(f'"{tag}"' for tag in tags)}]
 """
     return header
 
-def infer_doc_type(filepath):
-    """Infer document type from filepath"""
-    path_parts = Path(filepath).parts
-    
+@functools.lru_cache(maxsize=4096)
+def _doc_type_for_dir(dirpath):
+    """Infer document type from a directory path.
+
+    The type only depends on the parent directory, so caching by dirname
+    means one computation per directory instead of per file.
+    """
+    path_parts = dirpath.split(os.sep)
+    dirpath_lower = dirpath.lower()
+
     if 'research' in path_parts:
         return 'research'
-    elif 'midnight' in path_parts or 'documentation' in str(filepath).lower():
+    elif 'midnight' in path_parts or 'documentation' in dirpath_lower:
         return 'documentation'
-    elif 'tutorial' in str(filepath).lower():
+    elif 'tutorial' in dirpath_lower:
         return 'tutorial'
-    elif 'reference' in str(filepath).lower():
+    elif 'reference' in dirpath_lower:
         return 'reference'
     else:
         return 'general'
 
+def infer_doc_type(filepath):
+    """Infer document type from filepath"""
+    return _doc_type_for_dir(os.path.dirname(filepath))
+
 def infer_tags(filepath, title, content):
     """Infer tags from filepath, title, and content"""
     tags = set()
-    
-    # From filepath
-    path_str = str(filepath).lower()
-    if 'midnight' in path_str:
-        tags.add('midnight')
-    if 'zero-knowledge' in path_str or 'zk' in path_str:
-        tags.add('zero-knowledge')
-    if 'privacy' in path_str:
-        tags.add('privacy')
-    if 'blockchain' in path_str:
-        tags.add('blockchain')
-    
-    # From title
+
+    # Lowercase each input exactly once up front and reuse below
+    path_lower = filepath.lower()
     title_lower = title.lower()
+    content_sample = content[:500].lower()
+
+    # From filepath - split once into components and intersect with the
+    # keyword table rather than scanning the path per keyword
+    path_parts = set(_PATH_SPLIT_RE.split(path_lower))
+    tags.update(tag for keyword, tag in _PATH_TAGS.items()
+                if keyword in path_parts)
+
+    # From title
     if 'proof' in title_lower or 'zk' in title_lower:
         tags.add('cryptography')
     if 'smart contract' in title_lower:
         tags.add('smart-contracts')
     if 'tutorial' in title_lower or 'guide' in title_lower:
         tags.add('tutorial')
-    
-    # From content (first 500 chars)
-    content_sample = content[:500].lower()
-    keywords = {
-        'privacy': 'privacy',
-        'transaction': 'transactions',
-        'proof': 'cryptography',
-        'contract': 'smart-contracts',
-        'validator': 'consensus',
-        'token': 'tokens',
-        'dapp': 'dapps'
-    }
-    
-    for keyword, tag in keywords.items():
-        if keyword in content_sample:
-            tags.add(tag)
+
+    # From content - one combined-regex pass instead of a scan per keyword
+    for match in _TAG_RE.finditer(content_sample):
+        tags.add(_CONTENT_KEYWORD_TAGS[match.group()])
     
     return sorted(list(tags))
 
@@ -132,7 +150,8 @@ def add_header_to_file(filepath, dry_run=False, backup=True):
         has_header, extracted_title = extract_metadata_from_content(content)
         
         if has_header:
-            print(f"⏭️  Skipping (has header): {filepath}")
+            with _print_lock:
+                print(f"⏭️  Skipping (has header): {filepath}")
             return 'skipped'
         
         # Extract metadata from filename
@@ -160,29 +179,44 @@ def add_header_to_file(filepath, dry_run=False, backup=True):
         new_content = header + content
         
         if dry_run:
-            print(f"🔍 Would add header to: {filepath}")
-            print(f"   Title: {title}")
-            print(f"   Type: {doc_type}")
-            print(f"   Tags: {tags}")
+            with _print_lock:
+                print(f"🔍 Would add header to: {filepath}")
+                print(f"   Title: {title}")
+                print(f"   Type: {doc_type}")
+                print(f"   Tags: {tags}")
             return 'dry_run'
         
-        # Backup original file
+        # Backup original file via atomic rename (no bytes copied),
+        # then write the new content once to the original path
         if backup:
-            backup_path = f"{filepath}.backup"
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-        
+            os.replace(filepath, f"{filepath}.backup")
+
         # Write new content
-        with open(filepath, 'w', encoding='utf-8') as f:
+        with open(filepath, 'w', encoding='utf-8', buffering=1 << 16) as f:
             f.write(new_content)
         
-        print(f"✅ Added header to: {filepath}")
+        with _print_lock:
+            print(f"✅ Added header to: {filepath}")
         return 'success'
-        
+
     except Exception as e:
-        print(f"❌ Error processing {filepath}: {e}")
+        with _print_lock:
+            print(f"❌ Error processing {filepath}: {e}")
         return 'error'
 
+def _iter_md_files(directory, recursive=True):
+    """Yield paths of markdown files using os.scandir (faster than Path.rglob)"""
+    stack = [str(directory)]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif entry.name.endswith('.md') and entry.name != 'INDEX.md':
+                    yield entry.path
+
 def process_directory(directory, dry_run=False, backup=True, recursive=True):
     """Process all markdown files in a directory"""
     stats = {
@@ -192,16 +226,8 @@ def process_directory(directory, dry_run=False, backup=True, recursive=True):
         'dry_run': 0
     }
     
-    kb_path = Path(directory)
-    
-    # Find all markdown files
-    if recursive:
-        md_files = list(kb_path.rglob('*.md'))
-    else:
-        md_files = list(kb_path.glob('*.md'))
-    
-    # Exclude INDEX.md
-    md_files = [f for f in md_files if f.name != 'INDEX.md']
+    # Find all markdown files, excluding INDEX.md
+    md_files = list(_iter_md_files(directory, recursive))
     
     print(f"\n{'='*60}")
     print(f"Found {len(md_files)} markdown files to process")
@@ -209,9 +235,13 @@ def process_directory(directory, dry_run=False, backup=True, recursive=True):
     print(f"Backup: {backup}")
     print(f"{'='*60}\n")
     
-    for filepath in md_files:
-        result = add_header_to_file(filepath, dry_run, backup)
-        stats[result] += 1
+    # File processing is I/O-bound, so overlap the reads/writes with threads
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for result in executor.map(
+            lambda p: add_header_to_file(p, dry_run, backup), md_files
+        ):
+            stats[result] += 1
     
     print(f"\n{'='*60}")
     print("Summary:")
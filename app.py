@@ -1,17 +1,38 @@
 # File: app.py
 # Path: ~/knowledgeagent/app.py
 
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory
 from pathlib import Path
+import itertools
 import os
 import json
 import sqlite3
+import threading
 from datetime import datetime
 import markdown
 import re
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 app = Flask(__name__)
 
+# Serialize API responses with orjson (Rust JSON encoder, several times
+# faster than stdlib json on large document lists) when it's available
+if orjson is not None:
+    from flask.json.provider import JSONProvider
+
+    class ORJSONProvider(JSONProvider):
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = ORJSONProvider(app)
+
 @app.route('/midnight')
 def midnight():
     return render_template('midnight.html')
@@ -23,11 +44,37 @@ DATABASE_PATH = Path('research_tasks.db')
 # Ensure directories exist
 KNOWLEDGE_BASE_DIR.mkdir(exist_ok=True)
 
+# Reusable Markdown converter - building the extension chain per request is wasteful
+_MD = markdown.Markdown(extensions=['fenced_code', 'tables'])
+_md_lock = threading.Lock()
+
+def render_markdown(content):
+    """Convert markdown to HTML using the shared converter"""
+    with _md_lock:
+        return _MD.reset().convert(content)
+
+def _apply_pragmas(cursor):
+    """Tune SQLite for a local single-writer server.
+
+    WAL + synchronous=NORMAL avoids an fsync per commit; mmap_size serves
+    reads from mapped pages instead of read syscalls.
+    """
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.execute('PRAGMA cache_size=-65536')
+
+# Whether the sqlite build supports FTS5 (detected in init_db)
+_fts_available = False
+
 def init_db():
     """Initialize the SQLite database"""
+    global _fts_available
+
     conn = sqlite3.connect(DATABASE_PATH)
     cursor = conn.cursor()
-    
+    _apply_pragmas(cursor)
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS tasks (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -41,38 +88,188 @@ def init_db():
             error TEXT
         )
     ''')
-    
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_created_at
+        ON tasks(created_at DESC)
+    ''')
+
+    # Full-text index over the knowledge base so /api/search doesn't have
+    # to read every file per query
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts
+            USING fts5(path UNINDEXED, content, tokenize='porter unicode61')
+        ''')
+        _fts_available = True
+    except sqlite3.OperationalError:
+        # sqlite built without FTS5 - search falls back to a linear scan
+        _fts_available = False
+
     conn.commit()
     conn.close()
 
+def rebuild_search_index():
+    """Repopulate the FTS index from the markdown files on disk"""
+    if not _fts_available:
+        return
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    cursor.execute('DELETE FROM docs_fts')
+    for doc in scan_documents():
+        file_path = KNOWLEDGE_BASE_DIR / doc['relative_path']
+        try:
+            content = file_path.read_text(encoding='utf-8')
+        except Exception as e:
+            print(f"Error indexing {doc['relative_path']}: {e}")
+            continue
+        cursor.execute('INSERT INTO docs_fts (path, content) VALUES (?, ?)',
+                       (doc['relative_path'], content))
+
+    conn.commit()
+
+def remove_from_search_index(paths):
+    """Drop deleted documents from the FTS index"""
+    if not _fts_available or not paths:
+        return
+
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.executemany('DELETE FROM docs_fts WHERE path = ?',
+                       [(path,) for path in paths])
+    conn.commit()
+
+# Connections are cached per thread - reconnecting on every request costs
+# a header parse and journal check each time
+_db_local = threading.local()
+
 def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    """Get the calling thread's database connection (created on first use)"""
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        _apply_pragmas(conn.cursor())
+        _db_local.conn = conn
     return conn
 
-def scan_documents():
-    """Scan knowledge base directory for documents"""
-    documents = []
-    
+def _walk_md(root):
+    """Recursively yield (name, relative_path, size, mtime) for .md files.
+
+    Uses os.scandir directly instead of Path.rglob so each entry's stat
+    comes from the DirEntry cache rather than a separate syscall.
+    """
+    root = str(root)
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.md') and entry.name != 'INDEX.md':
+                    # DirEntry caches this stat - no second syscall downstream
+                    stat = entry.stat(follow_symlinks=False)
+                    yield (entry.name, os.path.relpath(entry.path, root),
+                           stat.st_size, stat.st_mtime)
+
+# Cache the scan results so repeated API hits don't re-walk an unchanged KB
+_scan_cache = {'mtime': None, 'docs': None, 'by_category': None}
+_scan_lock = threading.Lock()
+
+def invalidate_scan_cache():
+    """Drop the cached scan results (call after adding/deleting documents)"""
+    with _scan_lock:
+        _scan_cache['mtime'] = None
+        _scan_cache['docs'] = None
+        _scan_cache['by_category'] = None
+
+def _refresh_scan_cache():
+    """Re-walk the KB and rebuild both the flat list and the category index"""
     if not KNOWLEDGE_BASE_DIR.exists():
-        return documents
-    
-    for file_path in KNOWLEDGE_BASE_DIR.rglob('*.md'):
-        stat = file_path.stat()
-        rel_path = file_path.relative_to(KNOWLEDGE_BASE_DIR)
-        
-        documents.append({
-            'name': file_path.name,
-            'relative_path': str(rel_path),
-            'size': stat.st_size,
-            'modified': stat.st_mtime
-        })
-    
+        return [], {}
+
+    kb_mtime = os.stat(KNOWLEDGE_BASE_DIR).st_mtime
+
+    with _scan_lock:
+        if _scan_cache['docs'] is not None and _scan_cache['mtime'] == kb_mtime:
+            return _scan_cache['docs'], _scan_cache['by_category']
+
+    documents = []
+    by_category = {}
+    for name, rel_path, size, mtime in _walk_md(KNOWLEDGE_BASE_DIR):
+        doc = {
+            'name': name,
+            'relative_path': rel_path,
+            'size': size,
+            'modified': mtime
+        }
+        documents.append(doc)
+
+        # Group by category up front so /api/recent?category=... is a lookup
+        name_l = name.lower()
+        match = _CAT_NAME_RE.search(name_l)
+        category = match.lastgroup if match else _classify_by_path(
+            rel_path.lower(), name_l)
+        by_category.setdefault(category, []).append(doc)
+
     # Sort by modified time, newest first
     documents.sort(key=lambda x: x['modified'], reverse=True)
-    
-    return documents
+    for docs in by_category.values():
+        docs.sort(key=lambda x: x['modified'], reverse=True)
+
+    with _scan_lock:
+        _scan_cache['mtime'] = kb_mtime
+        _scan_cache['docs'] = documents
+        _scan_cache['by_category'] = by_category
+
+    return documents, by_category
+
+def scan_documents():
+    """Scan knowledge base directory for documents"""
+    return _refresh_scan_cache()[0]
+
+def scan_documents_by_category():
+    """Scan the knowledge base, grouped by category"""
+    return _refresh_scan_cache()[1]
+
+# Filename classifier: one compiled regex pass instead of ~15 substring
+# checks per document; group names double as the category keys
+_CAT_NAME_RE = re.compile(
+    r'(?P<smart_contracts>smart_?contract|plutus)'
+    r'|(?P<zkproofs>zk_?proof|zero[_-]knowledge)'
+    r'|(?P<healthcare>healthcare|health)'
+    r'|(?P<architecture>architecture)'
+    r'|(?P<competitors>competitor)'
+)
+
+# Path prefixes checked when the filename doesn't decide the category
+_CAT_PATH_PREFIXES = (
+    ('midnight', 'midnight'),
+    ('cardano', 'cardano'),
+    ('healthcare', 'healthcare'),
+    ('zkproofs', 'zkproofs'),
+    ('zk', 'zkproofs'),
+    ('smart_contracts', 'smart_contracts'),
+    ('smartcontracts', 'smart_contracts'),
+    ('architecture', 'architecture'),
+    ('competitors', 'competitors'),
+    ('research', 'research'),
+)
+
+def _classify_by_path(path, name):
+    """Fall back to the directory prefix, then the filename"""
+    for prefix, category in _CAT_PATH_PREFIXES:
+        if path.startswith(prefix):
+            return category
+    if 'midnight' in name:
+        return 'midnight'
+    if 'cardano' in name:  # This catches "Cardano_Node" files
+        return 'cardano'
+    # Default to research if no specific category matches
+    return 'research'
 
 def categorize_documents(documents):
     """Categorize documents based on their path or filename"""
@@ -86,80 +283,18 @@ def categorize_documents(documents):
         'competitors': {'count': 0, 'size': 0},
         'research': {'count': 0, 'size': 0}
     }
-    
+
     for doc in documents:
         path = doc['relative_path'].lower()
         name = doc['name'].lower()
-        size = doc['size']
-        
-        categorized = False
-        
+
         # Check filename FIRST for specific keywords (higher priority)
-        if 'smart_contract' in name or 'smartcontract' in name or 'plutus' in name:
-            categories['smart_contracts']['count'] += 1
-            categories['smart_contracts']['size'] += size
-            categorized = True
-        elif 'zkproof' in name or 'zk_proof' in name or 'zero_knowledge' in name or 'zero-knowledge' in name:
-            categories['zkproofs']['count'] += 1
-            categories['zkproofs']['size'] += size
-            categorized = True
-        elif 'healthcare' in name or 'health' in name:
-            categories['healthcare']['count'] += 1
-            categories['healthcare']['size'] += size
-            categorized = True
-        elif 'architecture' in name:
-            categories['architecture']['count'] += 1
-            categories['architecture']['size'] += size
-            categorized = True
-        elif 'competitor' in name:
-            categories['competitors']['count'] += 1
-            categories['competitors']['size'] += size
-            categorized = True
-        
-        # If not categorized by filename, check path
-        if not categorized:
-            if path.startswith('midnight'):
-                categories['midnight']['count'] += 1
-                categories['midnight']['size'] += size
-            elif path.startswith('cardano'):
-                categories['cardano']['count'] += 1
-                categories['cardano']['size'] += size
-            elif path.startswith('healthcare'):
-                categories['healthcare']['count'] += 1
-                categories['healthcare']['size'] += size
-            elif path.startswith('zkproofs') or path.startswith('zk'):
-                categories['zkproofs']['count'] += 1
-                categories['zkproofs']['size'] += size
-            elif path.startswith('smart_contracts') or path.startswith('smartcontracts'):
-                categories['smart_contracts']['count'] += 1
-                categories['smart_contracts']['size'] += size
-            elif path.startswith('architecture'):
-                categories['architecture']['count'] += 1
-                categories['architecture']['size'] += size
-            elif path.startswith('competitors'):
-                categories['competitors']['count'] += 1
-                categories['competitors']['size'] += size
-            elif path.startswith('research'):
-                categories['research']['count'] += 1
-                categories['research']['size'] += size
-            elif 'midnight' in name:
-                categories['midnight']['count'] += 1
-                categories['midnight']['size'] += size
-            elif 'cardano' in name:
-                categories['cardano']['count'] += 1
-                categories['cardano']['size'] += size
-            # In app.py - already works!
-            elif path.startswith('cardano'):
-                categories['cardano']['count'] += 1
-                categories['cardano']['size'] += size
-            elif 'cardano' in name:  # This catches "Cardano_Node" files
-                categories['cardano']['count'] += 1
-                categories['cardano']['size'] += size
-            else:
-                # Default to research if no specific category matches
-                categories['research']['count'] += 1
-                categories['research']['size'] += size
-    
+        match = _CAT_NAME_RE.search(name)
+        category = match.lastgroup if match else _classify_by_path(path, name)
+
+        categories[category]['count'] += 1
+        categories[category]['size'] += doc['size']
+
     return categories
 
 # Routes
@@ -189,30 +324,14 @@ def get_recent():
     """Get recent documents"""
     limit = request.args.get('limit', 50, type=int)
     category = request.args.get('category', '')
-    
-    documents = scan_documents()
-    
-    # Filter by category if specified
+
+    # The scan cache already groups documents by category, so filtering
+    # is a dict lookup instead of a second pass over every document
     if category:
-        filtered = []
-        for doc in documents:
-            path = doc['relative_path'].lower()
-            name = doc['name'].lower()
-            
-            # Match category - filename takes priority
-            matches = False
-            if category == 'smart_contracts':
-                matches = 'plutus' in name or 'smart_contract' in name or path.startswith('smart_contracts')
-            elif category == 'zkproofs':
-                matches = 'zkproof' in name or 'zk' in name or path.startswith('zkproofs')
-            else:
-                matches = path.startswith(category.lower()) or category.lower() in name
-            
-            if matches:
-                filtered.append(doc)
-        
-        documents = filtered
-    
+        documents = scan_documents_by_category().get(category.lower(), [])
+    else:
+        documents = scan_documents()
+
     # Limit results
     documents = documents[:limit]
     
@@ -231,8 +350,13 @@ def get_document(doc_path):
     
     try:
         content = file_path.read_text(encoding='utf-8')
-        html = markdown.markdown(content, extensions=['fenced_code', 'tables'])
-        
+        html = render_markdown(content)
+
+        # ?format=html skips the JSON wrapper (and the second copy of the
+        # raw content) for clients that only render the HTML
+        if request.args.get('format') == 'html':
+            return Response(html, mimetype='text/html')
+
         return jsonify({
             'content': content,
             'html': html
@@ -250,6 +374,8 @@ def delete_document(doc_path):
     
     try:
         file_path.unlink()
+        invalidate_scan_cache()
+        remove_from_search_index([doc_path])
         return jsonify({'message': 'Document deleted successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -273,7 +399,11 @@ def bulk_delete():
                 errors.append(f"{path}: Not found")
         except Exception as e:
             errors.append(f"{path}: {str(e)}")
-    
+
+    if deleted:
+        invalidate_scan_cache()
+        remove_from_search_index(deleted)
+
     return jsonify({
         'message': f'Deleted {len(deleted)} document(s)',
         'deleted': deleted,
@@ -282,11 +412,18 @@ def bulk_delete():
 
 @app.route('/api/tasks')
 def get_tasks():
-    """Get all research tasks"""
+    """Get research tasks, newest first (paginated)"""
+    limit = request.args.get('limit', 100, type=int)
+    offset = request.args.get('offset', 0, type=int)
+
     conn = get_db()
     cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM tasks ORDER BY created_at DESC')
+
+    cursor.execute('''
+        SELECT id, topic, context, source_type, source_url, status,
+               created_at, completed_at, error
+        FROM tasks ORDER BY created_at DESC LIMIT ? OFFSET ?
+    ''', (limit, offset))
     rows = cursor.fetchall()
     
     tasks = []
@@ -302,9 +439,7 @@ def get_tasks():
             'completed_at': row['completed_at'],
             'error': row['error']
         })
-    
-    conn.close()
-    
+
     return jsonify({'tasks': tasks})
 
 @app.route('/api/tasks', methods=['POST'])
@@ -330,7 +465,6 @@ def create_task():
     
     task_id = cursor.lastrowid
     conn.commit()
-    conn.close()
     
     return jsonify({
         'message': 'Task created successfully',
@@ -345,7 +479,6 @@ def approve_task(task_id):
     
     cursor.execute('UPDATE tasks SET status = ? WHERE id = ?', ('approved', task_id))
     conn.commit()
-    conn.close()
     
     return jsonify({'message': 'Task approved'})
 
@@ -361,7 +494,6 @@ def deny_task(task_id):
     cursor.execute('UPDATE tasks SET status = ?, error = ? WHERE id = ?', 
                    ('denied', reason, task_id))
     conn.commit()
-    conn.close()
     
     return jsonify({'message': 'Task denied'})
 
@@ -373,31 +505,51 @@ def delete_task(task_id):
     
     cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
     conn.commit()
-    conn.close()
     
     return jsonify({'message': 'Task deleted'})
 
-@app.route('/api/search')
-def search():
-    """Search documents"""
-    query = request.args.get('q', '').lower()
-    
-    if not query:
-        return jsonify({'results': [], 'total': 0})
-    
+def _search_fts(query):
+    """Query the FTS index - O(matches) instead of reading every file"""
+    conn = get_db()
+    cursor = conn.cursor()
+
+    # Quote the query so user input is treated as a phrase, not FTS syntax
+    match_expr = '"{}"'.format(query.replace('"', '""'))
+    cursor.execute('''
+        SELECT path, snippet(docs_fts, 1, '', '', '…', 16)
+        FROM docs_fts WHERE docs_fts MATCH ?
+    ''', (match_expr,))
+
     results = []
-    documents = scan_documents()
-    
-    for doc in documents:
+    for path, preview in cursor.fetchall():
+        results.append({
+            'relative_path': path,
+            'name': os.path.basename(path),
+            'preview': preview[:500]
+        })
+
+    return results
+
+def _search_linear(query):
+    """Fallback: scan every document's content for the query"""
+    results = []
+
+    # Case-insensitive regex search scans the content in C without the
+    # full-copy allocation that content.lower() would make per file
+    pattern = re.compile(re.escape(query), re.IGNORECASE)
+
+    for doc in scan_documents():
         file_path = KNOWLEDGE_BASE_DIR / doc['relative_path']
         try:
             content = file_path.read_text(encoding='utf-8')
-            if query in content.lower():
-                # Find context around the match
-                lines = content.split('\n')
-                matched_lines = [line for line in lines if query in line.lower()]
-                preview = '\n'.join(matched_lines[:3])
-                
+            if pattern.search(content):
+                # Show context around the first 3 matches
+                snippets = [
+                    content[max(0, m.start() - 60):m.end() + 60]
+                    for m in itertools.islice(pattern.finditer(content), 3)
+                ]
+                preview = '\n'.join(snippets)
+
                 results.append({
                     'relative_path': doc['relative_path'],
                     'name': doc['name'],
@@ -405,7 +557,22 @@ def search():
                 })
         except Exception as e:
             print(f"Error searching {doc['relative_path']}: {e}")
-    
+
+    return results
+
+@app.route('/api/search')
+def search():
+    """Search documents"""
+    query = request.args.get('q', '').lower()
+
+    if not query:
+        return jsonify({'results': [], 'total': 0})
+
+    if _fts_available:
+        results = _search_fts(query)
+    else:
+        results = _search_linear(query)
+
     return jsonify({
         'results': results,
         'total': len(results)
@@ -413,6 +580,7 @@ def search():
 
 if __name__ == '__main__':
     init_db()
+    rebuild_search_index()
     print(f"Knowledge base directory: {KNOWLEDGE_BASE_DIR.absolute()}")
     print(f"Database: {DATABASE_PATH.absolute()}")
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -3,79 +3,386 @@ Midnight Knowledge Base Agent System
 A multi-agent system for building and maintaining a comprehensive knowledge base
 """
 
+import bisect
+import functools
+import mmap
 import os
+import re
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import logging
 from typing import List, Dict
 import json
 
+try:
+    import orjson
+except ImportError:  # optional accelerator - stdlib json still works
+    orjson = None
+
+logger = logging.getLogger("kb")
+
+# Translation table that lowercases ASCII bytes in a single C pass
+_LOWER_TABLE = bytes(b + 32 if 65 <= b <= 90 else b for b in range(256))
+
+# Bloom filters over 3-grams let search skip files that cannot contain the
+# query without opening them. 2048 bits (~256 bytes per doc) keeps the
+# false-positive rate low for typical document sizes.
+_BLOOM_BITS = 2048
+
+
+@functools.lru_cache(maxsize=4096)
+def _lowered_file_bytes(filepath: str, mtime: float) -> bytes:
+    """Read and ASCII-lowercase a file, cached until its mtime changes.
+
+    Keyed on (path, mtime) so edits invalidate naturally; repeated
+    searches over a stable knowledge base become pure bytes.find calls.
+    Documents written by add_document carry a pre-lowercased .lc sidecar,
+    so cold-cache reads skip the translate pass too.
+    """
+    lc_path = filepath + ".lc"
+    try:
+        if os.stat(lc_path).st_mtime >= mtime:
+            with open(lc_path, 'rb') as f:
+                return f.read()
+    except OSError:
+        pass  # no sidecar (or unreadable) - lowercase on the fly
+    with open(filepath, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return bytes(mm).translate(_LOWER_TABLE)
+        finally:
+            mm.close()
+
+
+def _bloom_of(data: bytes) -> int:
+    """Build a 3-gram Bloom filter (as an int bitset) of lowercased bytes"""
+    bloom = 0
+    for i in range(len(data) - 2):
+        gram = data[i:i + 3]
+        h1 = zlib.crc32(gram)
+        h2 = zlib.crc32(gram, 0x9747B28C)
+        bloom |= (1 << (h1 % _BLOOM_BITS)) | (1 << (h2 % _BLOOM_BITS))
+    return bloom
+
 class KnowledgeBase:
     """Central knowledge repository"""
     
+    # Parallel tuples plus a frozenset: the tuples iterate cheaply in
+    # _initialize_structure/create_index, the set answers membership
+    # checks without building dict views per call
+    _CATEGORY_NAMES = (
+        "midnight",
+        "cardano",
+        "healthcare",
+        "zkproofs",
+        "competitors",
+        "architecture",
+        "smart_contracts",
+        "research",
+    )
+    _CATEGORY_DESC = (
+        "Midnight blockchain documentation",
+        "Cardano technical specs",
+        "Healthcare standards and regulations",
+        "Zero-knowledge proof research",
+        "Competitive analysis",
+        "System architecture and design",
+        "Smart contract patterns and code",
+        "Raw research findings",
+    )
+    _CATEGORY_SET = frozenset(_CATEGORY_NAMES)
+
     def __init__(self, base_path: str = "./knowledge_base"):
         self.base_path = base_path
-        self.categories = {
-            "midnight": "Midnight blockchain documentation",
-            "cardano": "Cardano technical specs",
-            "healthcare": "Healthcare standards and regulations",
-            "zkproofs": "Zero-knowledge proof research",
-            "competitors": "Competitive analysis",
-            "architecture": "System architecture and design",
-            "smart_contracts": "Smart contract patterns and code",
-            "research": "Raw research findings"
-        }
+        # Kept as a dict for external callers that iterate kb.categories
+        self.categories = dict(zip(self._CATEGORY_NAMES, self._CATEGORY_DESC))
         self._initialize_structure()
-    
+        self._manifest = self._load_manifest()
+        self._conn = self._init_search_index()
+
     def _initialize_structure(self):
         """Create folder structure for knowledge base"""
-        for category in self.categories.keys():
+        for category in self._CATEGORY_NAMES:
             path = os.path.join(self.base_path, category)
             os.makedirs(path, exist_ok=True)
-    
-    def add_document(self, category: str, title: str, content: str, 
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.base_path, "_manifest.json")
+
+    def _load_manifest(self) -> Dict:
+        """Load the cached file manifest, rebuilding it on first run.
+
+        The manifest maps category -> [[filename, mtime, title, bloom], ...]
+        so index and maintenance passes don't have to re-walk the
+        filesystem, and search can consult each document's 3-gram Bloom
+        filter (hex string) before opening the file.
+        """
+        try:
+            with open(self._manifest_path(), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return self._build_manifest()
+
+    def _build_manifest(self) -> Dict:
+        """Scan the category folders once to build the manifest"""
+        manifest = {category: [] for category in self._CATEGORY_NAMES}
+        for category in self._CATEGORY_NAMES:
+            path = os.path.join(self.base_path, category)
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.md'):
+                        title = entry.name[:-3].replace('_', ' ')
+                        with open(entry.path, 'rb') as f:
+                            lowered = f.read().translate(_LOWER_TABLE)
+                        manifest[category].append(
+                            [entry.name, entry.stat().st_mtime, title,
+                             f"{_bloom_of(lowered):x}"])
+            manifest[category].sort()
+        return manifest
+
+    def _save_manifest(self):
+        """Persist the manifest atomically"""
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp_path, self._manifest_path())
+
+    def _init_search_index(self):
+        """Open the FTS5 full-text index, or None if sqlite lacks FTS5.
+
+        The inverted index turns search from an O(total bytes) brute scan
+        into an O(log N) lookup; it is maintained incrementally as
+        documents are written.
+        """
+        conn = sqlite3.connect(os.path.join(self.base_path, "kb.db"))
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5("
+                "category, title, content, path UNINDEXED, "
+                "tokenize='porter unicode61')")
+        except sqlite3.OperationalError:
+            conn.close()
+            return None
+        if conn.execute("SELECT count(*) FROM docs").fetchone()[0] == 0:
+            self._backfill_search_index(conn)
+        return conn
+
+    def _backfill_search_index(self, conn):
+        """Index documents that predate the FTS5 table"""
+        rows = []
+        for category, entries in self._manifest.items():
+            for entry in entries:
+                filepath = f"{self.base_path}{os.sep}{category}{os.sep}{entry[0]}"
+                try:
+                    with open(filepath, 'r') as f:
+                        rows.append((category, entry[2], f.read(), filepath))
+                except OSError:
+                    continue
+        if rows:
+            conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", rows)
+            conn.commit()
+
+    def add_document(self, category: str, title: str, content: str,
                      metadata: Dict = None) -> str:
         """Add a document to the knowledge base"""
-        if category not in self.categories:
+        filepath = self._write_document(category, title, content, metadata)
+        self._save_manifest()
+        if self._conn is not None:
+            self._conn.commit()
+        return filepath
+
+    def add_documents(self, batch: List[tuple]) -> List[str]:
+        """Add a batch of (category, title, content, metadata) documents.
+
+        Each file is still written individually, but the manifest is
+        persisted once at the end instead of once per document.
+        """
+        filepaths = [self._write_document(category, title, content, metadata)
+                     for category, title, content, metadata in batch]
+        if filepaths:
+            self._save_manifest()
+            if self._conn is not None:
+                self._conn.commit()
+        return filepaths
+
+    def _write_document(self, category: str, title: str, content: str,
+                        metadata: Dict = None) -> str:
+        """Write a single document and record it in the in-memory manifest"""
+        if category not in self._CATEGORY_SET:
             raise ValueError(f"Invalid category: {category}")
         
-        # Create filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Create filename - one datetime.now() shared with the metadata so
+        # the two timestamps can't disagree
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         filename = f"{timestamp}_{title.replace(' ', '_')}.md"
         filepath = os.path.join(self.base_path, category, filename)
-        
+
         # Prepare document with metadata
         doc_metadata = metadata or {}
         doc_metadata.update({
-            "created": datetime.now().isoformat(),
+            "created": now.isoformat(),
             "category": category,
             "title": title
         })
         
-        # Write document
-        with open(filepath, 'w') as f:
-            f.write("---\n")
-            f.write(json.dumps(doc_metadata, indent=2))
-            f.write("\n---\n\n")
-            f.write(f"# {title}\n\n")
-            f.write(content)
-        
+        # Serialize the frontmatter with orjson when available (C encoder,
+        # returns bytes) and write the whole document with one syscall
+        if orjson is not None:
+            meta_bytes = orjson.dumps(doc_metadata, option=orjson.OPT_INDENT_2)
+        else:
+            meta_bytes = json.dumps(doc_metadata, indent=2).encode()
+        payload = b"".join([b"---\n", meta_bytes, b"\n---\n\n",
+                            f"# {title}\n\n{content}".encode()])
+        with open(filepath, 'wb') as f:
+            f.write(payload)
+
+        # Record the new file in the manifest so index/maintenance passes
+        # don't need to re-walk the directory tree. The Bloom filter is
+        # built once here and consulted on every future search. Sorted
+        # insert keeps each category list ordered (timestamped filenames
+        # sort chronologically) so create_index never has to sort.
+        lowered = payload.translate(_LOWER_TABLE)
+
+        # Pre-lowercased sidecar: search reads this directly instead of
+        # case-folding the document on every cold lookup. The bytes were
+        # already computed for the Bloom filter, so this is one write.
+        with open(filepath + ".lc", 'wb') as f:
+            f.write(lowered)
+
+        bisect.insort(
+            self._manifest.setdefault(category, []),
+            [filename, time.time(), filename[:-3].replace('_', ' '),
+             f"{_bloom_of(lowered):x}"])
+
+        # Keep the full-text index in step; the caller commits so batch
+        # writers pay for one transaction, not one per document
+        if self._conn is not None:
+            self._conn.execute(
+                "INSERT INTO docs VALUES (?, ?, ?, ?)",
+                (category, title, content, filepath))
+
         return filepath
     
     def search(self, query: str, category: str = None) -> List[str]:
         """Search for documents matching query"""
-        results = []
-        search_path = os.path.join(self.base_path, category) if category else self.base_path
-        
-        for root, dirs, files in os.walk(search_path):
-            for file in files:
-                if file.endswith('.md'):
-                    filepath = os.path.join(root, file)
-                    with open(filepath, 'r') as f:
-                        content = f.read()
-                        if query.lower() in content.lower():
-                            results.append(filepath)
-        
+        # Cheap guards before any file or index work: blank queries match
+        # nothing, single characters would match essentially everything
+        query = query.strip()
+        if not query:
+            return []
+        if len(query) < 2:
+            raise ValueError("query too short")
+
+        if self._conn is not None:
+            try:
+                return self._search_fts(query, category)
+            except sqlite3.OperationalError:
+                pass  # malformed MATCH expression - fall back to the scan
+        return self._search_linear(query, category)
+
+    def _search_fts(self, query: str, category: str = None) -> List[str]:
+        """Query the FTS5 inverted index"""
+        # Quote the query so user input is matched as a phrase rather
+        # than interpreted as FTS5 match syntax
+        match = '"{}"'.format(query.replace('"', '""'))
+        rows = self._conn.execute(
+            "SELECT path FROM docs WHERE docs MATCH ? "
+            "AND (? IS NULL OR category = ?)",
+            (match, category, category))
+        return [row[0] for row in rows]
+
+    def _search_linear(self, query: str, category: str = None) -> List[str]:
+        """Brute-force scan used when the FTS5 index is unavailable"""
+        # Case-fold the needle once; files are mmapped and lowercased with
+        # bytes.translate instead of allocating two full str copies per file
+        needle = query.encode().translate(_LOWER_TABLE)
+
+        # Bits every matching document's Bloom filter must have set. For
+        # selective queries this eliminates most files without a read.
+        required = _bloom_of(needle) if len(needle) >= 3 else 0
+
+        candidates = []
+        categories = [category] if category else list(self._manifest)
+        for cat in categories:
+            for entry in self._manifest.get(cat, []):
+                if required and len(entry) > 3:
+                    bloom = int(entry[3], 16)
+                    if bloom & required != required:
+                        continue
+                candidates.append(
+                    f"{self.base_path}{os.sep}{cat}{os.sep}{entry[0]}")
+
+        # Per-file checks are independent and dominated by file I/O plus
+        # C-level translate/find, both of which release the GIL - threads
+        # keep the device queue full without process overhead
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            hits = executor.map(
+                lambda p: self._file_contains(p, needle), candidates)
+            results = [path for path, hit in zip(candidates, hits) if hit]
+
         return results
 
+    def search_multi(self, queries: List[str], category: str = None) -> List[str]:
+        """Search for documents matching any of several queries.
+
+        Each file is scanned once with a compiled alternation of all the
+        needles instead of once per needle. (A pure-Python Aho-Corasick
+        automaton would cost more per byte than one C-level regex pass.)
+        """
+        # Same guards as search(): blank queries match nothing, single
+        # characters would match essentially everything
+        needles = [q.strip().encode().translate(_LOWER_TABLE)
+                   for q in queries]
+        needles = [n for n in needles if n]
+        if not needles:
+            return []
+        if any(len(n) < 2 for n in needles):
+            raise ValueError("query too short")
+
+        pattern = re.compile(b"|".join(map(re.escape, needles)))
+        masks = [_bloom_of(n) if len(n) >= 3 else 0 for n in needles]
+
+        candidates = []
+        categories = [category] if category else list(self._manifest)
+        for cat in categories:
+            for entry in self._manifest.get(cat, []):
+                if len(entry) > 3:
+                    bloom = int(entry[3], 16)
+                    # A file can only match if its Bloom filter covers
+                    # at least one needle's 3-gram bits
+                    if not any(bloom & mask == mask for mask in masks):
+                        continue
+                candidates.append(
+                    f"{self.base_path}{os.sep}{cat}{os.sep}{entry[0]}")
+
+        def _matches(path):
+            try:
+                st = os.stat(path)
+            except OSError:
+                return False  # stale manifest entry
+            if st.st_size == 0:
+                return False  # nothing to match, and mmap rejects it
+            return pattern.search(
+                _lowered_file_bytes(path, st.st_mtime)) is not None
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            hits = executor.map(_matches, candidates)
+            return [path for path, hit in zip(candidates, hits) if hit]
+
+    def _file_contains(self, filepath: str, needle: bytes) -> bool:
+        """Check whether a file contains the (already lowercased) needle"""
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return False  # stale manifest entry
+        if st.st_size == 0 or st.st_size < len(needle):
+            return False  # too small to match, and mmap rejects empty files
+        return _lowered_file_bytes(filepath, st.st_mtime).find(needle) != -1
+
 
 class ResearchCuratorAgent:
     """Agent responsible for gathering and curating research"""
@@ -89,7 +396,7 @@ class ResearchCuratorAgent:
         Research a topic from multiple sources
         In production, this would use web scraping, APIs, etc.
         """
-        print(f"[{self.name}] Researching: {topic}")
+        logger.info("[%s] Researching: %s", self.name, topic)
         
         # Placeholder for actual research logic
         # In reality, this would:
@@ -117,23 +424,27 @@ class ResearchCuratorAgent:
     
     def save_research(self, findings: Dict) -> str:
         """Save research findings to knowledge base"""
-        content = f"""
+        # Build the document as a list of parts and join once at the end;
+        # repeated str += re-copies the whole document on every append
+        parts = [f"""
 ## Summary
 {findings['summary']}
 
 ## Key Points
-"""
+"""]
         for point in findings['key_points']:
-            content += f"- {point}\n"
-        
-        content += "\n## Sources Checked\n"
+            parts.append(f"- {point}\n")
+
+        parts.append("\n## Sources Checked\n")
         for source in findings['sources_checked']:
-            content += f"- {source}\n"
-        
-        content += "\n## Raw Data\n"
+            parts.append(f"- {source}\n")
+
+        parts.append("\n## Raw Data\n")
         for source, data in findings['raw_data'].items():
-            content += f"\n### {source}\n{data}\n"
-        
+            parts.append(f"\n### {source}\n{data}\n")
+
+        content = "".join(parts)
+
         filepath = self.kb.add_document(
             category="research",
             title=findings['topic'],
@@ -144,7 +455,7 @@ class ResearchCuratorAgent:
             }
         )
         
-        print(f"[{self.name}] Research saved to: {filepath}")
+        logger.info("[%s] Research saved to: %s", self.name, filepath)
         return filepath
 
 
@@ -161,7 +472,8 @@ class DocumentationWriterAgent:
         Take raw research and create polished documentation
         In production, this would use Claude API or similar
         """
-        print(f"[{self.name}] Synthesizing documentation from {len(research_files)} sources")
+        logger.info("[%s] Synthesizing documentation from %d sources",
+                    self.name, len(research_files))
         
         # Placeholder for actual synthesis logic
         # In reality, this would:
@@ -213,7 +525,7 @@ The NIGHT and DUST token model provides...
             }
         )
         
-        print(f"[{self.name}] Documentation published to: {filepath}")
+        logger.info("[%s] Documentation published to: %s", self.name, filepath)
         return filepath
 
 
@@ -226,39 +538,42 @@ class KnowledgeBaseMaintainerAgent:
     
     def create_index(self) -> str:
         """Create an index of all documents"""
-        print(f"[{self.name}] Creating knowledge base index")
-        
-        index_content = "# Knowledge Base Index\n\n"
+        logger.info("[%s] Creating knowledge base index", self.name)
         
+        # Accumulate lines in a list and join once - quadratic str += hurts
+        # as the index grows
+        index_parts = ["# Knowledge Base Index\n\n"]
+
         for category, description in self.kb.categories.items():
-            index_content += f"## {category.title()}\n"
-            index_content += f"*{description}*\n\n"
-            
-            category_path = os.path.join(self.kb.base_path, category)
-            files = [f for f in os.listdir(category_path) if f.endswith('.md')]
-            
-            if files:
-                for file in sorted(files):
-                    # Extract title from filename
-                    title = file.replace('.md', '').replace('_', ' ')
-                    rel_path = f"{category}/{file}"
-                    index_content += f"- [{title}]({rel_path})\n"
+            index_parts.append(f"## {category.title()}\n")
+            index_parts.append(f"*{description}*\n\n")
+
+            # The manifest already holds filenames and titles in sorted
+            # order, so no per-category os.listdir or sort is needed
+            entries = self.kb._manifest.get(category, [])
+
+            if entries:
+                for filename, _, title, *_unused in entries:
+                    rel_path = f"{category}/{filename}"
+                    index_parts.append(f"- [{title}]({rel_path})\n")
             else:
-                index_content += "*No documents yet*\n"
-            
-            index_content += "\n"
-        
+                index_parts.append("*No documents yet*\n")
+
+            index_parts.append("\n")
+
+        index_content = "".join(index_parts)
+
         # Save index
         index_path = os.path.join(self.kb.base_path, "INDEX.md")
         with open(index_path, 'w') as f:
             f.write(index_content)
         
-        print(f"[{self.name}] Index created at: {index_path}")
+        logger.info("[%s] Index created at: %s", self.name, index_path)
         return index_path
     
     def add_cross_references(self, doc_path: str) -> None:
         """Add links between related documents"""
-        print(f"[{self.name}] Adding cross-references to: {doc_path}")
+        logger.info("[%s] Adding cross-references to: %s", self.name, doc_path)
         
         # Placeholder for cross-referencing logic
         # In reality, this would:
@@ -271,20 +586,18 @@ class KnowledgeBaseMaintainerAgent:
     
     def identify_outdated_docs(self, days: int = 30) -> List[str]:
         """Find documents that might need updating"""
-        print(f"[{self.name}] Checking for outdated documents (>{days} days old)")
-        
-        outdated = []
         cutoff_date = datetime.now().timestamp() - (days * 24 * 60 * 60)
-        
-        for root, dirs, files in os.walk(self.kb.base_path):
-            for file in files:
-                if file.endswith('.md'):
-                    filepath = os.path.join(root, file)
-                    file_time = os.path.getmtime(filepath)
-                    if file_time < cutoff_date:
-                        outdated.append(filepath)
-        
-        print(f"[{self.name}] Found {len(outdated)} potentially outdated documents")
+
+        # Pure in-memory filter over the manifest - no filesystem walk.
+        # f-string concatenation: the components are fixed, so there is
+        # no need for os.path.join's per-call separator handling.
+        outdated = [
+            f"{self.kb.base_path}{os.sep}{category}{os.sep}{filename}"
+            for category, entries in self.kb._manifest.items()
+            for filename, mtime, *_unused in entries
+            if mtime < cutoff_date
+        ]
+
         return outdated
 
 
@@ -301,9 +614,8 @@ class AgentOrchestrator:
         """
         Complete workflow: research -> document -> organize
         """
-        print(f"\n{'='*60}")
-        print(f"Starting research and documentation workflow for: {topic}")
-        print(f"{'='*60}\n")
+        logger.info("Starting research and documentation workflow for: %s",
+                    topic)
         
         # Step 1: Research
         findings = self.research_agent.research_topic(topic, sources)
@@ -316,9 +628,7 @@ class AgentOrchestrator:
         # Step 3: Update index
         index_file = self.maintainer_agent.create_index()
         
-        print(f"\n{'='*60}")
-        print(f"Workflow complete!")
-        print(f"{'='*60}\n")
+        logger.info("Workflow complete!")
         
         return {
             "research_file": research_file,
@@ -329,6 +639,9 @@ class AgentOrchestrator:
 
 # Example usage
 if __name__ == "__main__":
+    # Show the workflow progress messages when run as a script
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     # Initialize the system
     kb = KnowledgeBase()
     orchestrator = AgentOrchestrator(kb)
@@ -16,15 +16,30 @@ This system coordinates three agents:
 """
 
 import anthropic
+import asyncio
+import atexit
+import hashlib
+import httpx
 import os
+import pickle
+import re
+import sqlite3
 import sys
+import string
+import threading
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # optional accelerator - stdlib json still works
+    orjson = None
+
 # Load environment variables FIRST
 load_dotenv()
 
@@ -36,6 +51,66 @@ DOCS_DIR = KB_DIR / "midnight"
 MODEL_NAME = "claude-3-5-haiku-20241022"
 MAX_TOKENS = 4096
 
+# Stable prompt prefixes, sent as cached system blocks. Keeping these
+# byte-identical across calls lets the API serve the prefix from its
+# prompt cache - input tokens on cache hits cost ~10% and time-to-first-
+# token drops accordingly. Only the per-call topic/material goes in the
+# user message.
+RESEARCH_PREAMBLE = """You are a research agent for a blockchain infrastructure project focusing on Midnight (privacy-preserving blockchain on Cardano).
+
+For each research topic provide:
+1. A comprehensive summary of the topic
+2. Key points and important details
+3. Technical specifications if applicable
+4. Relevant use cases or applications
+5. Any concerns or limitations
+6. Sources or references (even if general)
+
+Format your response as structured research findings."""
+
+SYNTHESIS_PREAMBLE = """You are a technical documentation writer. Synthesize the research material provided into a clear, well-structured document for the stated audience.
+
+Create comprehensive documentation that:
+1. Has a clear title and introduction
+2. Is well-organized with proper headings
+3. Includes code examples where relevant
+4. Explains concepts clearly for the target audience
+5. Includes practical implementation guidance
+6. Has a summary or conclusion
+
+Format the output in clean Markdown."""
+
+GAP_ANALYSIS_PREAMBLE = """You are analyzing a knowledge base for a Midnight blockchain infrastructure project.
+
+Given the current knowledge base index, identify:
+1. Important topics that are missing or underdocumented
+2. Areas that need more depth
+3. Topics that should be added for completeness
+4. Suggested priorities for new documentation
+
+Focus on: Midnight blockchain, privacy features, healthcare applications, zero-knowledge proofs, smart contracts, and infrastructure.
+
+Provide a prioritized list of gaps and recommendations."""
+
+
+# Per-call user messages as precompiled templates. Template.substitute
+# guarantees the literal text is byte-identical from call to call, which
+# keeps the server-side prompt cache hitting; f-string edits drifting a
+# space would silently break that.
+RESEARCH_PROMPT = string.Template("Research Topic: $topic$context_line")
+SYNTHESIS_PROMPT = string.Template(
+    "Document type: $doc_type\n"
+    "Target audience: $target_audience\n\n"
+    "Research Material:\n$research_material")
+GAP_ANALYSIS_PROMPT = string.Template(
+    "Current Knowledge Base Index:\n$index_content")
+
+
+def _cached_system(preamble: str) -> List[Dict]:
+    """Wrap a stable preamble as a cache-flagged system block"""
+    return [{"type": "text", "text": preamble,
+             "cache_control": {"type": "ephemeral"}}]
+
 # Initialize Claude API - ONLY ONCE
 api_key = os.getenv("ANTHROPIC_API_KEY")
 
@@ -45,14 +120,99 @@ if not api_key:
     print("  export ANTHROPIC_API_KEY='your-key-here'")
     sys.exit(1)
 
+# HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 without it
 try:
-    client = anthropic.Anthropic(api_key=api_key)
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# Pooled keep-alive transport shared by every API call: connections stay
+# warm between requests (no repeated TLS setup) and the caps are high
+# enough for the async and batch workflows to run concurrently
+_HTTP_LIMITS = httpx.Limits(max_connections=100,
+                            max_keepalive_connections=50,
+                            keepalive_expiry=60)
+_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+try:
+    _http_client = httpx.Client(http2=_HTTP2, limits=_HTTP_LIMITS,
+                                timeout=_HTTP_TIMEOUT)
+    _async_http_client = httpx.AsyncClient(http2=_HTTP2, limits=_HTTP_LIMITS,
+                                           timeout=_HTTP_TIMEOUT)
+    atexit.register(_http_client.close)
+    client = anthropic.Anthropic(api_key=api_key, http_client=_http_client)
+    # Async twin of the client for the concurrent multi-topic workflow
+    aclient = anthropic.AsyncAnthropic(api_key=api_key,
+                                       http_client=_async_http_client)
     print(f"✓ Anthropic client initialized successfully")
 except Exception as e:
     print(f"ERROR: Failed to initialize Anthropic client: {e}")
     sys.exit(1)
 
 
+class ClaudeCache:
+    """Disk-backed exact-match cache in front of client.messages.create.
+
+    Research topics recur across runs; a hit returns the stored response
+    in milliseconds at zero API cost. Entries are keyed by the SHA-256 of
+    the full request payload, pickled under KB_DIR/.cache/, and expire
+    after ttl seconds so stale answers age out.
+    """
+
+    def __init__(self, cache_dir: Path = KB_DIR / ".cache",
+                 ttl: int = 7 * 24 * 3600):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+
+    def _key(self, kwargs: Dict) -> str:
+        payload = json.dumps(kwargs, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def create(self, **kwargs):
+        """Drop-in for client.messages.create with read-through caching"""
+        path = self.cache_dir / f"{self._key(kwargs)}.pkl"
+        try:
+            if time.time() - path.stat().st_mtime < self.ttl:
+                with open(path, 'rb') as f:
+                    return pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            pass  # missing, expired or unreadable - fall through to the API
+
+        response = client.messages.create(**kwargs)
+
+        try:
+            with open(path, 'wb') as f:
+                pickle.dump(response, f)
+        except (OSError, pickle.PicklingError):
+            pass  # a cold cache next run is fine; never fail the call
+        return response
+
+
+# Shared read-through cache for the interactive call sites
+cached_client = ClaudeCache()
+
+
+def _batch_read_files(paths: List[str]) -> Dict[str, object]:
+    """Read many files concurrently; maps path -> text (or the exception).
+
+    Reads are independent and block on the filesystem, so a thread pool
+    overlaps the per-file latency instead of paying it serially. (An
+    io_uring batch would go further, but liburing is not a dependency;
+    the pool gives the same overlap from the stdlib.)
+    """
+    def _read(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        return dict(zip(paths, executor.map(_read, paths)))
+
+
 def save_with_header(content, filepath, agent_name, status="Success"):
     """Save file with standardized header"""
     header = f"""<!-- File: {filepath.name} -->
@@ -62,8 +222,13 @@ def save_with_header(content, filepath, agent_name, status="Success"):
 <!-- Status: {status} -->
 
 """
-    with open(filepath, 'w') as f:
-        f.write(header + content)
+    # Scatter-gather write: header and content go out in one syscall
+    # without allocating a concatenated copy of the whole document
+    fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.writev(fd, [header.encode(), content.encode()])
+    finally:
+        os.close(fd)
 
 
 def test_api_connection():
@@ -123,58 +288,227 @@ class KnowledgeBase:
             "research": "Raw research findings"
         }
         self._initialize_structure()
-    
+        self._manifest = self._load_manifest()
+        # The dashboard shares one KnowledgeBase across Flask worker
+        # threads and the background researcher, so FTS access goes
+        # through a single cross-thread connection behind this lock
+        self._conn_lock = threading.Lock()
+        self._conn = self._init_search_index()
+        # path -> (mtime, lowercased bytes); lets repeated linear searches
+        # skip re-reading and re-casefolding unchanged files
+        self._lower_cache: Dict[str, tuple] = {}
+
     def _initialize_structure(self):
         """Create folder structure for knowledge base"""
-        for category in self.categories.keys():
-            path = os.path.join(self.base_path, category)
+        # Category paths never change after init, so build each join once
+        self._category_paths = {
+            category: os.path.join(self.base_path, category)
+            for category in self.categories
+        }
+        for path in self._category_paths.values():
             os.makedirs(path, exist_ok=True)
-    
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.base_path, ".manifest.json")
+
+    def _load_manifest(self) -> Dict:
+        """Load the cached file manifest, rebuilding it on first run.
+
+        Maps path -> [mtime, size, category] so index and maintenance
+        passes cost one JSON load instead of an os.walk + stat per file.
+        """
+        try:
+            with open(self._manifest_path(), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return self._build_manifest()
+
+    def _build_manifest(self) -> Dict:
+        """Scan the category folders once; DirEntry.stat is cached so
+        each file costs a single syscall"""
+        manifest = {}
+        for category in self.categories:
+            with os.scandir(self._category_paths[category]) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.md'):
+                        st = entry.stat()
+                        manifest[entry.path] = [st.st_mtime, st.st_size,
+                                                category]
+        return manifest
+
+    def _save_manifest(self):
+        """Persist the manifest atomically"""
+        tmp_path = self._manifest_path() + ".tmp"
+        if orjson is not None:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(self._manifest))
+        else:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._manifest, f)
+        os.replace(tmp_path, self._manifest_path())
+
+    def _init_search_index(self):
+        """Open the FTS5 full-text index, or None if sqlite lacks FTS5.
+
+        BM25-ranked inverted-index lookups replace the O(corpus bytes)
+        linear scan; the index is kept current in add_document.
+        """
+        conn = sqlite3.connect(os.path.join(self.base_path, "kb.db"),
+                               check_same_thread=False)
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5("
+                "category, title, content, path UNINDEXED, "
+                "tokenize='porter unicode61')")
+        except sqlite3.OperationalError:
+            conn.close()
+            return None
+        if conn.execute("SELECT count(*) FROM docs").fetchone()[0] == 0:
+            self._backfill_search_index(conn)
+        return conn
+
+    def _backfill_search_index(self, conn):
+        """Index documents that predate the FTS5 table"""
+        rows = []
+        for root, dirs, files in os.walk(self.base_path):
+            for file in files:
+                if file.endswith('.md') and file != 'INDEX.md':
+                    filepath = os.path.join(root, file)
+                    category = os.path.basename(root)
+                    title = file.replace('.md', '').replace('_', ' ')
+                    try:
+                        with open(filepath, 'r') as f:
+                            rows.append((category, title, f.read(), filepath))
+                    except OSError:
+                        continue
+        if rows:
+            conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", rows)
+            conn.commit()
+
     def add_document(self, category: str, title: str, content: str, 
                      metadata: Dict = None) -> str:
         """Add a document to the knowledge base"""
         if category not in self.categories:
             raise ValueError(f"Invalid category: {category}")
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # One datetime.now() shared by the filename and the metadata
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         filename = f"{timestamp}_{title.replace(' ', '_')}.md"
-        filepath = os.path.join(self.base_path, category, filename)
-        
+        filepath = os.path.join(self._category_paths[category], filename)
+
         doc_metadata = metadata or {}
         doc_metadata.update({
-            "created": datetime.now().isoformat(),
+            "created": now.isoformat(),
             "category": category,
             "title": title
         })
         
-        with open(filepath, 'w') as f:
-            f.write("---\n")
-            f.write(json.dumps(doc_metadata, indent=2))
-            f.write("\n---\n\n")
-            f.write(f"# {title}\n\n")
-            f.write(content)
-        
+        # Assemble the whole document once and write it with one syscall
+        # instead of five buffered writes. orjson's C encoder returns
+        # bytes directly, skipping the str round trip.
+        if orjson is not None:
+            meta_bytes = orjson.dumps(doc_metadata, option=orjson.OPT_INDENT_2)
+        else:
+            meta_bytes = json.dumps(doc_metadata, indent=2).encode()
+        payload = b"".join([
+            b"---\n",
+            meta_bytes,
+            b"\n---\n\n",
+            f"# {title}\n\n".encode(),
+            content.encode()
+        ])
+        with open(filepath, 'wb') as f:
+            f.write(payload)
+
+        # Record the new file in the manifest so index/maintenance passes
+        # don't need to re-walk the directory tree
+        self._manifest[filepath] = [time.time(),
+                                    os.path.getsize(filepath), category]
+        self._save_manifest()
+
+        # Keep the full-text index in step with the file
+        if self._conn is not None:
+            with self._conn_lock:
+                self._conn.execute(
+                    "INSERT INTO docs VALUES (?, ?, ?, ?)",
+                    (category, title, content, filepath))
+                self._conn.commit()
+
         return filepath
-    
+
+    def remove_documents(self, paths: List[str]) -> None:
+        """Forget deleted files so later passes don't resurrect them.
+
+        Drops the manifest entries, cached lowered content, and FTS
+        rows for each path, then persists the manifest once.
+        """
+        changed = False
+        for path in paths:
+            if self._manifest.pop(path, None) is not None:
+                changed = True
+            self._lower_cache.pop(path, None)
+
+        if paths and self._conn is not None:
+            with self._conn_lock:
+                self._conn.executemany(
+                    "DELETE FROM docs WHERE path = ?",
+                    [(path,) for path in paths])
+                self._conn.commit()
+
+        if changed:
+            self._save_manifest()
+
     def get_document(self, filepath: str) -> str:
         """Read a document from the knowledge base"""
         with open(filepath, 'r') as f:
             return f.read()
     
     def search(self, query: str, category: str = None) -> List[str]:
-        """Search for documents matching query"""
+        """Search for documents matching query, best matches first"""
+        if self._conn is not None:
+            try:
+                # Quote the query so user input is matched as a phrase
+                # rather than interpreted as FTS5 match syntax
+                match = '"{}"'.format(query.replace('"', '""'))
+                with self._conn_lock:
+                    rows = self._conn.execute(
+                        "SELECT path FROM docs WHERE docs MATCH ? "
+                        "AND (? IS NULL OR category = ?) "
+                        "ORDER BY bm25(docs)",
+                        (match, category, category)).fetchall()
+                return [row[0] for row in rows]
+            except sqlite3.OperationalError:
+                pass  # malformed MATCH expression - fall back to the scan
+
+        return self._search_linear(query, category)
+
+    def _search_linear(self, query: str, category: str = None) -> List[str]:
+        """Brute-force scan used when the FTS5 index is unavailable"""
         results = []
         search_path = os.path.join(self.base_path, category) if category else self.base_path
-        
+
+        # Case-fold the needle once; per-file content is cached lowercased
+        # and invalidated by mtime, so a stable KB costs one bytes.find
+        # per file instead of a read + two str.lower passes
+        needle = query.encode().lower()
+
         for root, dirs, files in os.walk(search_path):
             for file in files:
                 if file.endswith('.md'):
                     filepath = os.path.join(root, file)
-                    with open(filepath, 'r') as f:
-                        content = f.read()
-                        if query.lower() in content.lower():
-                            results.append(filepath)
-        
+                    try:
+                        mtime = os.path.getmtime(filepath)
+                    except OSError:
+                        continue
+                    cached = self._lower_cache.get(filepath)
+                    if cached is None or cached[0] != mtime:
+                        with open(filepath, 'rb') as f:
+                            cached = (mtime, f.read().lower())
+                        self._lower_cache[filepath] = cached
+                    if cached[1].find(needle) != -1:
+                        results.append(filepath)
+
         return results
 
 
@@ -185,36 +519,30 @@ class ResearchCuratorAgent:
         self.kb = knowledge_base
         self.name = "Research Curator"
     
+    def research_prompt(self, topic: str, context: str = "") -> str:
+        """Per-call user message; the stable instructions live in
+        RESEARCH_PREAMBLE so the cached prefix stays byte-identical."""
+        return RESEARCH_PROMPT.substitute(
+            topic=topic,
+            context_line=f"\n\nAdditional Context: {context}" if context else "")
+
     def research_topic(self, topic: str, context: str = "") -> Dict:
         """Research a topic using Claude's knowledge"""
         print(f"[{self.name}] Researching: {topic}")
-        
-        prompt = f"""You are a research agent for a blockchain infrastructure project focusing on Midnight (privacy-preserving blockchain on Cardano).
-
-Research Topic: {topic}
-
-{f"Additional Context: {context}" if context else ""}
-
-Please provide:
-1. A comprehensive summary of this topic
-2. Key points and important details
-3. Technical specifications if applicable
-4. Relevant use cases or applications
-5. Any concerns or limitations
-6. Sources or references (even if general)
 
-Format your response as structured research findings."""
+        prompt = self.research_prompt(topic, context)
 
         try:
-            message = client.messages.create(
+            message = cached_client.create(
                 model=MODEL_NAME,
                 max_tokens=MAX_TOKENS,
+                system=_cached_system(RESEARCH_PREAMBLE),
                 messages=[{
                     "role": "user",
                     "content": prompt
                 }]
             )
-            
+
             research_content = message.content[0].text
             
             findings = {
@@ -236,12 +564,12 @@ Format your response as structured research findings."""
                 "timestamp": datetime.now().isoformat()
             }
     
-    def save_research(self, findings: Dict) -> str:
+    def save_research(self, findings: Dict, category: str = "research") -> str:
         """Save research findings to knowledge base"""
         content = findings['summary']
-        
+
         filepath = self.kb.add_document(
-            category="research",
+            category=category,
             title=findings['topic'],
             content=content,
             metadata={
@@ -257,23 +585,30 @@ Format your response as structured research findings."""
 # Add this method to DocumentationWriterAgent in kb_agent_system_claude.py
 # Right after the __init__ method (around line 350)
 
+# All category keywords in one compiled alternation; the named group of
+# each hit says which category matched, so detection is a single C-level
+# scan of the text instead of up to 21 substring passes
+_CATEGORY_RE = re.compile(
+    r"(?P<cardano>cardano|ada|plutus|stake pool)"
+    r"|(?P<healthcare>healthcare|health|hipaa|fhir|medical)"
+    r"|(?P<zkproofs>zero knowledge|zk-|zkp|proof)"
+    r"|(?P<smart_contracts>smart contract|solidity|contract)"
+    r"|(?P<architecture>architecture|design|system|infrastructure)"
+)
+# Checked in this order so the old if/elif priority is preserved
+_CATEGORY_PRIORITY = ("cardano", "healthcare", "zkproofs",
+                      "smart_contracts", "architecture")
+
+
 def _detect_category(self, topic: str, context: str, source_url: str = "") -> str:
     """Smart category detection"""
     combined_text = f"{topic} {context} {source_url}".lower()
-    
-    # Simple keyword matching
-    if any(word in combined_text for word in ['cardano', 'ada', 'plutus', 'stake pool']):
-        return 'cardano'
-    elif any(word in combined_text for word in ['healthcare', 'health', 'hipaa', 'fhir', 'medical']):
-        return 'healthcare'
-    elif any(word in combined_text for word in ['zero knowledge', 'zk-', 'zkp', 'proof']):
-        return 'zkproofs'
-    elif any(word in combined_text for word in ['smart contract', 'solidity', 'contract']):
-        return 'smart_contracts'
-    elif any(word in combined_text for word in ['architecture', 'design', 'system', 'infrastructure']):
-        return 'architecture'
-    else:
-        return 'midnight'
+
+    matched = {m.lastgroup for m in _CATEGORY_RE.finditer(combined_text)}
+    for category in _CATEGORY_PRIORITY:
+        if category in matched:
+            return category
+    return 'midnight'
 
 class DocumentationWriterAgent:
     """Agent responsible for creating clean documentation with Claude"""
@@ -282,14 +617,47 @@ class DocumentationWriterAgent:
         self.kb = knowledge_base
         self.name = "Documentation Writer"
     
-    def _call_claude_with_retry(self, prompt: str, max_retries: int = 3):
-        """Call Claude API with exponential backoff retry"""
+    def synthesis_prompt(self, research_material: str,
+                         doc_type: str = "guide",
+                         target_audience: str = "developers") -> str:
+        """Per-call user message; the stable instructions live in
+        SYNTHESIS_PREAMBLE so the cached prefix stays byte-identical."""
+        return SYNTHESIS_PROMPT.substitute(
+            doc_type=doc_type,
+            target_audience=target_audience,
+            research_material=research_material)
+
+    def _call_claude_with_retry(self, prompt: str, max_retries: int = 3,
+                                sink=None):
+        """Call Claude API with exponential backoff retry.
+
+        When `sink` is given (any callable taking a str), the response is
+        streamed and each text chunk is handed to the sink as it arrives,
+        so first bytes land ~100ms after the request instead of after the
+        full generation. The final message is returned either way.
+        """
         for attempt in range(max_retries):
             try:
-                response = client.messages.create(
+                if sink is not None:
+                    with client.messages.stream(
+                        model=MODEL_NAME,
+                        max_tokens=MAX_TOKENS,
+                        temperature=0.7,
+                        system=_cached_system(SYNTHESIS_PREAMBLE),
+                        messages=[{
+                            "role": "user",
+                            "content": prompt
+                        }]
+                    ) as stream:
+                        for text in stream.text_stream:
+                            sink(text)
+                        return stream.get_final_message()
+
+                response = cached_client.create(
                     model=MODEL_NAME,
                     max_tokens=MAX_TOKENS,
                     temperature=0.7,
+                    system=_cached_system(SYNTHESIS_PREAMBLE),
                     messages=[{
                         "role": "user",
                         "content": prompt
@@ -313,46 +681,41 @@ class DocumentationWriterAgent:
                 else:
                     raise
     
-    def synthesize_documentation(self, research_files: List[str], 
+    def synthesize_documentation(self, research_files: List[str],
                                   doc_type: str = "guide",
-                                  target_audience: str = "developers") -> Dict:
-        """Take raw research and create polished documentation using Claude"""
+                                  target_audience: str = "developers",
+                                  sink=None) -> Dict:
+        """Take raw research and create polished documentation using Claude.
+
+        Pass `sink` (e.g. a file's write method) to stream the generated
+        text somewhere as it arrives rather than waiting for the full
+        response.
+        """
         print(f"[{self.name}] Synthesizing documentation from {len(research_files)} sources")
         
+        contents = {}
         try:
-            # Read all research files
+            # Read all research files in one batch
+            contents = _batch_read_files(research_files)
             research_content = []
             for file_path in research_files:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        research_content.append(f"## Source: {file_path}\n\n{content}\n\n")
-                except Exception as e:
-                    print(f"[{self.name}] Warning: Could not read {file_path}: {e}")
+                content = contents[file_path]
+                if isinstance(content, Exception):
+                    print(f"[{self.name}] Warning: Could not read {file_path}: {content}")
+                else:
+                    research_content.append(f"## Source: {file_path}\n\n{content}\n\n")
             
             if not research_content:
                 raise ValueError("No research content available to synthesize")
             
             combined_research = "\n".join(research_content)
-            
-            # Create prompt for Claude
-            prompt = f"""You are a technical documentation writer. Please synthesize the following research into a clear, well-structured {doc_type} for {target_audience}.
 
-Research Material:
-{combined_research}
-
-Please create comprehensive documentation that:
-1. Has a clear title and introduction
-2. Is well-organized with proper headings
-3. Includes code examples where relevant
-4. Explains concepts clearly for {target_audience}
-5. Includes practical implementation guidance
-6. Has a summary or conclusion
-
-Format the output in clean Markdown."""
+            # Create prompt for Claude
+            prompt = self.synthesis_prompt(combined_research, doc_type,
+                                           target_audience)
 
             # Call Claude API with retry logic
-            response = self._call_claude_with_retry(prompt)
+            response = self._call_claude_with_retry(prompt, sink=sink)
             
             # Extract the documentation
             documentation = response.content[0].text
@@ -377,13 +740,22 @@ Format the output in clean Markdown."""
             
         except Exception as e:
             print(f"[{self.name}] Error creating documentation: {e}")
-            return self._create_error_fallback(research_files, str(e))
-    
-    def _create_error_fallback(self, research_files: List[str], error_msg: str) -> Dict:
-        """Create a basic documentation file when API fails"""
+            return self._create_error_fallback(research_files, str(e), contents)
+
+    def _create_error_fallback(self, research_files: List[str], error_msg: str,
+                               research_texts: Dict = None) -> Dict:
+        """Create a basic documentation file when API fails.
+
+        `research_texts` carries the contents already read by
+        synthesize_documentation so the error path doesn't re-open and
+        re-decode every source file.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        fallback_content = f"""# Documentation Generation Failed
+        research_texts = research_texts or {}
+
+        # Collect chunks and join once - repeated += re-copies the whole
+        # fallback document per source
+        parts = [f"""# Documentation Generation Failed
 
 **Error:** {error_msg}
 **Timestamp:** {timestamp}
@@ -392,22 +764,28 @@ Format the output in clean Markdown."""
 
 The following research was collected but could not be synthesized due to an error:
 
-"""
-        
+"""]
+
         for file_path in research_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    fallback_content += f"\n---\n\n### Source: {file_path}\n\n{content}\n\n"
-            except Exception as e:
-                fallback_content += f"\n- Could not read {file_path}: {e}\n"
-        
-        fallback_content += "\n---\n\n*Please check your API configuration and try again.*\n"
-        
+            content = research_texts.get(file_path)
+            if content is None:
+                # not read before the failure - read it now
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                except Exception as e:
+                    content = e
+            if isinstance(content, Exception):
+                parts.append(f"\n- Could not read {file_path}: {content}\n")
+            else:
+                parts.append(f"\n---\n\n### Source: {file_path}\n\n{content}\n\n")
+
+        parts.append("\n---\n\n*Please check your API configuration and try again.*\n")
+
         return {
             "title": "Documentation (Error)",
             "type": "error",
-            "content": fallback_content,
+            "content": "".join(parts),
             "category": "midnight",
             "written_by": "Fallback",
             "error": error_msg
@@ -434,6 +812,10 @@ The following research was collected but could not be synthesized due to an erro
         return filepath
 
 
+# One-pass filename -> title translation table (no intermediate strings)
+_TITLE_TRANS = str.maketrans('_', ' ')
+
+
 class KnowledgeBaseMaintainerAgent:
     """Agent responsible for organizing and maintaining the KB with Claude"""
     
@@ -445,38 +827,88 @@ class KnowledgeBaseMaintainerAgent:
         """Create an index of all documents"""
         print(f"[{self.name}] Creating knowledge base index")
         
-        index_content = "# Knowledge Base Index\n\n"
-        index_content += f"*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n"
-        
+        # Accumulate lines in a list and join once - quadratic str +=
+        # hurts as the index grows
+        parts = ["# Knowledge Base Index\n\n",
+                 f"*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n"]
+
         total_docs = 0
-        
+
         for category, description in self.kb.categories.items():
-            index_content += f"## {category.title()}\n"
-            index_content += f"*{description}*\n\n"
-            
-            category_path = os.path.join(self.kb.base_path, category)
-            files = [f for f in os.listdir(category_path) if f.endswith('.md')]
-            
+            parts.append(f"## {category.title()}\n")
+            parts.append(f"*{description}*\n\n")
+
+            # The manifest already knows every file per category, so no
+            # per-category listdir is needed
+            files = [os.path.basename(path)
+                     for path, meta in self.kb._manifest.items()
+                     if meta[2] == category]
+
             if files:
                 total_docs += len(files)
                 for file in sorted(files, reverse=True):
-                    title = file.replace('.md', '').replace('_', ' ')
+                    # single translate pass instead of two replace() copies
+                    title = file[:-3].translate(_TITLE_TRANS)
                     rel_path = f"{category}/{file}"
-                    index_content += f"- [{title}]({rel_path})\n"
+                    parts.append(f"- [{title}]({rel_path})\n")
             else:
-                index_content += "*No documents yet*\n"
-            
-            index_content += "\n"
-        
-        index_content += f"\n---\n**Total Documents: {total_docs}**\n"
-        
+                parts.append("*No documents yet*\n")
+
+            parts.append("\n")
+
+        parts.append(f"\n---\n**Total Documents: {total_docs}**\n")
+        index_content = "".join(parts)
+
         index_path = os.path.join(self.kb.base_path, "INDEX.md")
         with open(index_path, 'w') as f:
             f.write(index_content)
         
         print(f"[{self.name}] Index created at: {index_path} ({total_docs} documents)")
         return index_path
-    
+
+    def remove_entries(self, paths: List[str]) -> str:
+        """Drop deleted documents from INDEX.md without a full rebuild.
+
+        Edits only the affected link lines and the document total, then
+        rewrites the index once. Falls back to create_index when the
+        index file is missing or the deletion covers a large share of
+        the knowledge base (an edit would not be cheaper then).
+        """
+        index_path = os.path.join(self.kb.base_path, "INDEX.md")
+        total = len(self.kb._manifest) or 1
+
+        # Forget the files in the manifest and FTS index first, so
+        # neither path below (edit or rebuild) can resurrect them
+        self.kb.remove_documents(paths)
+
+        if not os.path.exists(index_path) or len(paths) * 4 > total:
+            return self.create_index()
+
+        base = str(self.kb.base_path)
+        rel_paths = {os.path.relpath(p, base) for p in paths}
+
+        removed = 0
+        kept = []
+        with open(index_path, 'r') as f:
+            for line in f:
+                if line.startswith('- ['):
+                    target = line[line.rfind('](') + 2:line.rfind(')')]
+                    if target in rel_paths:
+                        removed += 1
+                        continue
+                kept.append(line)
+
+        if removed:
+            content = re.sub(
+                r'\*\*Total Documents: (\d+)\*\*',
+                lambda m: f"**Total Documents: {int(m.group(1)) - removed}**",
+                "".join(kept), count=1)
+            with open(index_path, 'w') as f:
+                f.write(content)
+
+        print(f"[{self.name}] Removed {removed} entries from index")
+        return index_path
+
     def analyze_knowledge_gaps(self) -> str:
         """Use Claude to identify gaps in documentation"""
         print(f"[{self.name}] Analyzing knowledge gaps...")
@@ -488,25 +920,13 @@ class KnowledgeBaseMaintainerAgent:
         except:
             index_content = "No index available"
         
-        prompt = f"""You are analyzing a knowledge base for a Midnight blockchain infrastructure project.
-
-Current Knowledge Base Index:
-{index_content}
-
-Please identify:
-1. Important topics that are missing or underdocumented
-2. Areas that need more depth
-3. Topics that should be added for completeness
-4. Suggested priorities for new documentation
-
-Focus on: Midnight blockchain, privacy features, healthcare applications, zero-knowledge proofs, smart contracts, and infrastructure.
-
-Provide a prioritized list of gaps and recommendations."""
+        prompt = GAP_ANALYSIS_PROMPT.substitute(index_content=index_content)
 
         try:
             message = client.messages.create(
                 model=MODEL_NAME,
                 max_tokens=2048,
+                system=_cached_system(GAP_ANALYSIS_PREAMBLE),
                 messages=[{
                     "role": "user",
                     "content": prompt
@@ -537,17 +957,13 @@ Provide a prioritized list of gaps and recommendations."""
         """Find documents that might need updating"""
         print(f"[{self.name}] Checking for outdated documents (>{days} days old)")
         
-        outdated = []
         cutoff_date = datetime.now().timestamp() - (days * 24 * 60 * 60)
-        
-        for root, dirs, files in os.walk(self.kb.base_path):
-            for file in files:
-                if file.endswith('.md') and file != 'INDEX.md':
-                    filepath = os.path.join(root, file)
-                    file_time = os.path.getmtime(filepath)
-                    if file_time < cutoff_date:
-                        outdated.append(filepath)
-        
+
+        # Pure in-memory filter over the manifest - no filesystem walk
+        outdated = [path for path, meta in self.kb._manifest.items()
+                    if meta[0] < cutoff_date]
+
+
         print(f"[{self.name}] Found {len(outdated)} potentially outdated documents")
         return outdated
 
@@ -561,25 +977,33 @@ class AgentOrchestrator:
         self.doc_agent = DocumentationWriterAgent(knowledge_base)
         self.maintainer_agent = KnowledgeBaseMaintainerAgent(knowledge_base)
     
-    def research_and_document(self, topic: str, context: str = "", 
+    def research_and_document(self, topic: str, context: str = "",
                              doc_type: str = "guide",
-                             target_audience: str = "developers") -> Dict:
-        """Complete workflow: research -> document -> organize"""
+                             target_audience: str = "developers",
+                             category: str = None) -> Dict:
+        """Complete workflow: research -> document -> organize.
+
+        When `category` is given, both files are written straight into
+        that category so callers don't have to move them afterwards.
+        """
         print(f"\n{'='*60}")
         print(f"Starting research and documentation workflow")
         print(f"Topic: {topic}")
         print(f"{'='*60}\n")
-        
+
         # Step 1: Research with Claude
         findings = self.research_agent.research_topic(topic, context)
-        research_file = self.research_agent.save_research(findings)
-        
+        research_file = self.research_agent.save_research(
+            findings, category=category or "research")
+
         # Step 2: Create documentation with Claude
         doc = self.doc_agent.synthesize_documentation(
-            [research_file], 
+            [research_file],
             doc_type=doc_type,
             target_audience=target_audience
         )
+        if category:
+            doc['category'] = category
         doc_file = self.doc_agent.publish_documentation(doc)
         
         # Step 3: Update index
@@ -595,6 +1019,199 @@ class AgentOrchestrator:
             "index_file": index_file
         }
     
+    async def research_and_document_many(self, topics: List[Dict],
+                                         concurrency: int = 10) -> List[Dict]:
+        """Run the research -> document workflow for many topics concurrently.
+
+        Each API call is seconds of network RTT, so running topics serially
+        makes latency additive. asyncio.gather overlaps the calls while a
+        semaphore keeps at most `concurrency` requests in flight; file I/O
+        and index maintenance stay on the main thread afterwards.
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one(spec: Dict) -> Dict:
+            topic = spec['topic']
+            context = spec.get('context', '')
+
+            async with sem:
+                print(f"[Async] Researching: {topic}")
+                message = await aclient.messages.create(
+                    model=MODEL_NAME,
+                    max_tokens=MAX_TOKENS,
+                    system=_cached_system(RESEARCH_PREAMBLE),
+                    messages=[{
+                        "role": "user",
+                        "content": self.research_agent.research_prompt(
+                            topic, context)
+                    }]
+                )
+            findings = {
+                "topic": topic,
+                "summary": message.content[0].text,
+                "researched_by": MODEL_NAME,
+                "timestamp": datetime.now().isoformat()
+            }
+            research_file = self.research_agent.save_research(findings)
+
+            async with sem:
+                print(f"[Async] Synthesizing: {topic}")
+                response = await aclient.messages.create(
+                    model=MODEL_NAME,
+                    max_tokens=MAX_TOKENS,
+                    temperature=0.7,
+                    system=_cached_system(SYNTHESIS_PREAMBLE),
+                    messages=[{
+                        "role": "user",
+                        "content": self.doc_agent.synthesis_prompt(
+                            f"## Source: {research_file}\n\n"
+                            f"{self.kb.get_document(research_file)}\n")
+                    }]
+                )
+            documentation = response.content[0].text
+
+            title = "Documentation"
+            for line in documentation.split('\n'):
+                if line.startswith('# '):
+                    title = line.replace('# ', '').strip()
+                    break
+
+            doc_file = self.doc_agent.publish_documentation({
+                "title": title,
+                "type": "guide",
+                "content": documentation,
+                "category": "midnight",
+                "written_by": MODEL_NAME,
+                "sources": [research_file]
+            })
+            return {"topic": topic,
+                    "research_file": research_file,
+                    "documentation_file": doc_file}
+
+        results = list(await asyncio.gather(*[_one(spec) for spec in topics]))
+
+        # One index rebuild after all topics land
+        self.maintainer_agent.create_index()
+        return results
+
+    def research_and_document_batch(self, topics: List[Dict]) -> List[Dict]:
+        """Research and document many topics via the Message Batches API.
+
+        Each topic is a dict with 'topic' and optional 'context'. Instead
+        of one synchronous API round trip per topic, all research prompts
+        go up as a single batch job (and likewise for the synthesis pass),
+        so wall time is one submit+poll cycle per phase and batched tokens
+        are billed at half the interactive rate.
+        """
+        print(f"\n{'='*60}")
+        print(f"Starting batched workflow for {len(topics)} topics")
+        print(f"{'='*60}\n")
+
+        # Phase 1: submit all research prompts as one batch
+        requests = []
+        for i, spec in enumerate(topics):
+            prompt = self.research_agent.research_prompt(
+                spec['topic'], spec.get('context', ''))
+            requests.append({
+                "custom_id": f"research-{i}",
+                "params": {
+                    "model": MODEL_NAME,
+                    "max_tokens": MAX_TOKENS,
+                    "system": _cached_system(RESEARCH_PREAMBLE),
+                    "messages": [{"role": "user", "content": prompt}]
+                }
+            })
+
+        research_texts = self._run_batch(requests, "research")
+
+        # Route results back through the curator so files land exactly as
+        # they would from the per-topic path
+        research_files = {}
+        for i, spec in enumerate(topics):
+            text = research_texts.get(f"research-{i}")
+            if text is None:
+                print(f"[Batch] No research result for topic: {spec['topic']}")
+                continue
+            findings = {
+                "topic": spec['topic'],
+                "summary": text,
+                "researched_by": MODEL_NAME,
+                "timestamp": datetime.now().isoformat()
+            }
+            research_files[i] = self.research_agent.save_research(findings)
+
+        # Phase 2: one batch of synthesis prompts over the saved research
+        requests = []
+        for i, research_file in research_files.items():
+            content = self.kb.get_document(research_file)
+            prompt = self.doc_agent.synthesis_prompt(
+                f"## Source: {research_file}\n\n{content}\n")
+            requests.append({
+                "custom_id": f"doc-{i}",
+                "params": {
+                    "model": MODEL_NAME,
+                    "max_tokens": MAX_TOKENS,
+                    "system": _cached_system(SYNTHESIS_PREAMBLE),
+                    "messages": [{"role": "user", "content": prompt}]
+                }
+            })
+
+        doc_texts = self._run_batch(requests, "documentation") if requests else {}
+
+        results = []
+        for i, spec in enumerate(topics):
+            documentation = doc_texts.get(f"doc-{i}")
+            if documentation is None:
+                results.append({"topic": spec['topic'],
+                                "research_file": research_files.get(i)})
+                continue
+
+            title = "Documentation"
+            for line in documentation.split('\n'):
+                if line.startswith('# '):
+                    title = line.replace('# ', '').strip()
+                    break
+
+            doc_file = self.doc_agent.publish_documentation({
+                "title": title,
+                "type": "guide",
+                "content": documentation,
+                "category": "midnight",
+                "written_by": MODEL_NAME,
+                "sources": [research_files[i]]
+            })
+            results.append({"topic": spec['topic'],
+                            "research_file": research_files[i],
+                            "documentation_file": doc_file})
+
+        # One index rebuild for the whole batch
+        self.maintainer_agent.create_index()
+
+        print(f"\n{'='*60}")
+        print(f"Batched workflow complete!")
+        print(f"{'='*60}\n")
+        return results
+
+    def _run_batch(self, requests: List[Dict], label: str,
+                   poll_interval: int = 10) -> Dict[str, str]:
+        """Submit a message batch, poll to completion, map custom_id -> text"""
+        batch = client.messages.batches.create(requests=requests)
+        print(f"[Batch] Submitted {len(requests)} {label} requests "
+              f"(batch {batch.id})")
+
+        while batch.processing_status != "ended":
+            time.sleep(poll_interval)
+            batch = client.messages.batches.retrieve(batch.id)
+
+        texts = {}
+        for result in client.messages.batches.results(batch.id):
+            if result.result.type == "succeeded":
+                texts[result.custom_id] = result.result.message.content[0].text
+            else:
+                print(f"[Batch] Request {result.custom_id} failed: "
+                      f"{result.result.type}")
+        return texts
+
     def analyze_and_plan(self):
         """Analyze knowledge base and suggest next topics"""
         print(f"\n{'='*60}")
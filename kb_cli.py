@@ -3,11 +3,45 @@
 Knowledge Base CLI Tool
 Manage your Midnight blockchain knowledge base
 """
+import functools
+import heapq
+import itertools
+import shutil
 import sys
 import os
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+import re
 from pathlib import Path
 from kb_agent_system_claude import KnowledgeBase, AgentOrchestrator
 
+# Error-document filename test as one compiled scan (an [Ee]rror hit
+# followed eventually by the trailing .md) instead of endswith plus two
+# substring passes per name
+_ERROR_MD_RE = re.compile(r'[Ee]rror.*\.md\Z')
+
+@functools.lru_cache(maxsize=1)
+def _get_kb():
+    """Construct the KnowledgeBase once per process.
+
+    Init scans the base directory and loads the manifest/search index, so
+    commands that need it more than once (and any future REPL/daemon
+    mode) shouldn't pay that repeatedly.
+    """
+    return KnowledgeBase()
+
+@functools.lru_cache(maxsize=1)
+def _get_orch():
+    """Construct the AgentOrchestrator and its agents once per process"""
+    return AgentOrchestrator(_get_kb())
+
+@functools.lru_cache(maxsize=1)
+def _valid_categories():
+    """Category names from the KB itself - one source of truth, O(1) lookup"""
+    return frozenset(_get_kb().categories)
+
 def print_header(text):
     """Print a formatted header"""
     print("\n" + "="*60)
@@ -60,8 +94,7 @@ def cmd_research(args):
     
     print_header(f"Researching: {topic}")
     
-    kb = KnowledgeBase()
-    orchestrator = AgentOrchestrator(kb)
+    orchestrator = _get_orch()
     
     result = orchestrator.research_and_document(
         topic=topic,
@@ -85,7 +118,7 @@ def cmd_search(args):
     query = " ".join(args)
     print_header(f"Searching for: {query}")
     
-    kb = KnowledgeBase()
+    kb = _get_kb()
     results = kb.search(query)
     
     if not results:
@@ -102,8 +135,8 @@ def cmd_search(args):
         print(f"\n📄 Preview of first result:")
         print("-" * 60)
         with open(results[0], 'r') as f:
-            lines = f.readlines()
-            for line in lines[:15]:  # First 15 lines
+            # Read exactly 15 lines instead of buffering the whole file
+            for line in itertools.islice(f, 15):
                 print(line.rstrip())
         print("-" * 60)
 
@@ -111,8 +144,7 @@ def cmd_gaps(args):
     """Analyze knowledge gaps"""
     print_header("Analyzing Knowledge Gaps")
     
-    kb = KnowledgeBase()
-    orchestrator = AgentOrchestrator(kb)
+    orchestrator = _get_orch()
     
     gaps = orchestrator.analyze_and_plan()
     print(gaps)
@@ -121,62 +153,74 @@ def cmd_index(args):
     """Update the knowledge base index"""
     print_header("Updating Knowledge Base Index")
     
-    kb = KnowledgeBase()
-    orchestrator = AgentOrchestrator(kb)
+    orchestrator = _get_orch()
     
     index_file = orchestrator.maintainer_agent.create_index()
     print(f"✅ Index updated: {index_file}")
 
 def cmd_recent(args):
     """Show recent documents"""
-    category = args[0] if len(args) > 0 and args[0] in ["midnight", "research", "cardano", "healthcare", "zkproofs", "architecture"] else None
+    category = args[0] if len(args) > 0 and args[0] in _valid_categories() else None
     limit = int(args[1]) if len(args) > 1 else 10
     
     print_header(f"Recent Documents{' in ' + category if category else ''}")
     
-    kb = KnowledgeBase()
+    kb = _get_kb()
     search_path = os.path.join(kb.base_path, category) if category else kb.base_path
     
+    # Iterative scandir traversal: DirEntry.stat() is cached from the
+    # directory read, so there's no extra stat syscall per file, and we
+    # keep plain strings until the few printed entries need a Path
     files = []
-    for root, dirs, filenames in os.walk(search_path):
-        for f in filenames:
-            if f.endswith('.md') and f != 'INDEX.md':
-                filepath = Path(root) / f
-                files.append((filepath.stat().st_mtime, filepath))
-    
-    files.sort(reverse=True)
-    
+    stack = [search_path]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.md') and entry.name != 'INDEX.md':
+                    files.append((entry.stat().st_mtime, entry.path))
+
     if not files:
         print("❌ No documents found")
         return
-    
-    print(f"Showing {min(limit, len(files))} of {len(files)} documents:\n")
-    for i, (mtime, filepath) in enumerate(files[:limit], 1):
-        rel_path = filepath.relative_to(kb.base_path)
-        from datetime import datetime
-        date_str = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M')
-        print(f"{i:2d}. [{date_str}] {rel_path}")
+
+    # O(N log limit) instead of sorting the whole list
+    newest = heapq.nlargest(limit, files)
+
+    print(f"Showing {len(newest)} of {len(files)} documents:\n")
+    # Slice the base prefix off once-measured strings and format via
+    # time.strftime - no Path or datetime objects per row
+    base_len = len(str(kb.base_path)) + 1
+    for i, (mtime, filepath) in enumerate(newest, 1):
+        date_str = time.strftime('%Y-%m-%d %H:%M', time.localtime(mtime))
+        print(f"{i:2d}. [{date_str}] {filepath[base_len:]}")
 
 def cmd_stats(args):
     """Show knowledge base statistics"""
     print_header("Knowledge Base Statistics")
     
-    kb = KnowledgeBase()
+    kb = _get_kb()
     categories = {}
     total = 0
     total_size = 0
     
     for category in kb.categories.keys():
         cat_path = os.path.join(kb.base_path, category)
-        if os.path.exists(cat_path):
-            files = [f for f in os.listdir(cat_path) if f.endswith('.md')]
-            count = len(files)
-            categories[category] = count
-            total += count
-            
-            # Calculate size
-            for f in files:
-                total_size += os.path.getsize(os.path.join(cat_path, f))
+        count = 0
+        try:
+            # One scandir pass per category: DirEntry.stat() is cached
+            # from the directory read, so no extra stat per file
+            with os.scandir(cat_path) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.md') and entry.is_file():
+                        count += 1
+                        total_size += entry.stat().st_size
+        except FileNotFoundError:
+            continue
+        categories[category] = count
+        total += count
     
     print(f"📊 Total Documents: {total}")
     print(f"💾 Total Size: {total_size / 1024:.1f} KB\n")
@@ -206,38 +250,47 @@ def cmd_view(args):
     
     print_header(f"Viewing: {filepath}")
     
-    with open(filepath, 'r') as f:
-        content = f.read()
-        print(content)
+    # Stream the file to stdout instead of materializing it as one big
+    # string; peak memory stays at the copy buffer size
+    with open(filepath, 'rb') as f:
+        sys.stdout.flush()
+        shutil.copyfileobj(f, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
 
 def cmd_cleanup(args):
     """Clean up error documents with selection"""
     print_header("Error Document Cleanup")
     
-    kb = KnowledgeBase()
+    kb = _get_kb()
     error_files = []
-    
-    # Find all error documents
-    for root, dirs, files in os.walk(kb.base_path):
-        for file in files:
-            if ('error' in file.lower() or 'Error' in file) and file.endswith('.md'):
-                filepath = os.path.join(root, file)
-                error_files.append(filepath)
+
+    # Find all error documents with an iterative scandir walk
+    stack = deque([str(kb.base_path)])
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif _ERROR_MD_RE.search(entry.name):
+                    # Carry size/mtime from the cached DirEntry stat so
+                    # the display loop doesn't re-stat every file
+                    st = entry.stat()
+                    error_files.append((entry.path, st.st_size, st.st_mtime))
     
     if not error_files:
         print("✅ No error documents found")
         return
     
     print(f"Found {len(error_files)} error document(s):\n")
-    
+
+    base_len = len(str(kb.base_path)) + 1
+
     # Show list with numbers
-    for i, filepath in enumerate(error_files, 1):
-        rel_path = Path(filepath).relative_to(kb.base_path)
-        stat = os.stat(filepath)
-        size = stat.st_size / 1024  # KB
-        modified = datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M')
-        print(f"{i:2d}. {rel_path}")
-        print(f"    Size: {size:.1f} KB  |  Modified: {modified}")
+    for i, (filepath, size, mtime) in enumerate(error_files, 1):
+        modified = time.strftime('%Y-%m-%d %H:%M', time.localtime(mtime))
+        print(f"{i:2d}. {filepath[base_len:]}")
+        print(f"    Size: {size / 1024:.1f} KB  |  Modified: {modified}")
         print()
     
     print("Options:")
@@ -255,11 +308,11 @@ def cmd_cleanup(args):
     # Determine which files to delete
     to_delete = []
     if choice == 'all':
-        to_delete = error_files
+        to_delete = [path for path, _, _ in error_files]
     else:
         try:
             indices = [int(x.strip()) for x in choice.split(',')]
-            to_delete = [error_files[i-1] for i in indices if 0 < i <= len(error_files)]
+            to_delete = [error_files[i-1][0] for i in indices if 0 < i <= len(error_files)]
         except (ValueError, IndexError):
             print("❌ Invalid selection")
             return
@@ -271,8 +324,7 @@ def cmd_cleanup(args):
     # Confirm deletion
     print(f"\n⚠️  About to delete {len(to_delete)} file(s):")
     for filepath in to_delete:
-        rel_path = Path(filepath).relative_to(kb.base_path)
-        print(f"  - {rel_path}")
+        print(f"  - {filepath[base_len:]}")
     
     print()
     confirm = input("Type 'DELETE' to confirm: ")
@@ -286,28 +338,27 @@ def cmd_cleanup(args):
     failed = 0
     for filepath in to_delete:
         try:
-            os.remove(filepath)
+            os.unlink(filepath)
             deleted += 1
-            print(f"✓ Deleted: {Path(filepath).relative_to(kb.base_path)}")
+            print(f"✓ Deleted: {filepath[base_len:]}")
         except Exception as e:
             failed += 1
-            print(f"✗ Failed: {Path(filepath).relative_to(kb.base_path)} - {e}")
+            print(f"✗ Failed: {filepath[base_len:]} - {e}")
     
     print(f"\n✅ Successfully deleted {deleted} file(s)")
     if failed > 0:
         print(f"⚠️  Failed to delete {failed} file(s)")
     
-    # Regenerate index
+    # Update the index in place (full rebuild only for large deletions)
     if deleted > 0:
-        orchestrator = AgentOrchestrator(kb)
-        orchestrator.maintainer_agent.create_index()
-        print("✅ Index regenerated")
+        _get_orch().maintainer_agent.remove_entries(to_delete)
+        print("✅ Index updated")
 
 def cmd_categories(args):
     """List all categories"""
     print_header("Knowledge Base Categories")
     
-    kb = KnowledgeBase()
+    kb = _get_kb()
     
     for category, description in kb.categories.items():
         cat_path = os.path.join(kb.base_path, category)
@@ -324,8 +375,7 @@ def cmd_outdated(args):
     
     print_header(f"Documents Older Than {days} Days")
     
-    kb = KnowledgeBase()
-    orchestrator = AgentOrchestrator(kb)
+    orchestrator = _get_orch()
     
     outdated = orchestrator.maintainer_agent.identify_outdated_docs(days=days)
     
@@ -334,15 +384,24 @@ def cmd_outdated(args):
         return
     
     print(f"⚠️  Found {len(outdated)} outdated documents:\n")
+    base_len = len(str(_get_kb().base_path)) + 1
     for i, filepath in enumerate(outdated, 1):
-        rel_path = Path(filepath).relative_to(kb.base_path)
-        from datetime import datetime
         mtime = os.path.getmtime(filepath)
-        date_str = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d')
-        print(f"{i:2d}. [{date_str}] {rel_path}")
+        date_str = time.strftime('%Y-%m-%d', time.localtime(mtime))
+        print(f"{i:2d}. [{date_str}] {filepath[base_len:]}")
+
+def _excepthook(exc_type, exc, tb):
+    """Uniform CLI failure formatting without a try frame per command"""
+    if issubclass(exc_type, KeyboardInterrupt):
+        print("\n\n⚠️  Interrupted by user")
+        return
+    print(f"\n❌ Error: {exc}")
+    traceback.print_exception(exc_type, exc, tb)
 
 def main():
     """Main CLI entry point"""
+    sys.excepthook = _excepthook
+
     if len(sys.argv) < 2:
         show_help()
         sys.exit(0)
@@ -370,16 +429,9 @@ def main():
         print("Run './kb_cli.py help' for usage information")
         sys.exit(1)
     
-    try:
-        commands[command](args)
-    except KeyboardInterrupt:
-        print("\n\n⚠️  Interrupted by user")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+    # The excepthook handles failures; the happy path runs with no
+    # try frame at all
+    commands[command](args)
 
 if __name__ == "__main__":
     main()
@@ -3,141 +3,145 @@
 Research Worker - Monitors database and processes approved tasks
 """
 
+import functools
+import re
 import sqlite3
 import time
 import sys
-import shutil
+from collections import namedtuple
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 from kb_agent_system_claude import AgentOrchestrator, KnowledgeBase
 
 DATABASE_PATH = Path('research_tasks.db')
 CHECK_INTERVAL = 5  # seconds
-KB_DIR = Path('knowledge_base')
+MAX_CHECK_INTERVAL = 60  # cap for the idle backoff
+BATCH_SIZE = 10  # approved tasks drained per poll
 
-def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(DATABASE_PATH)
+# The only columns process_task actually reads; fetching them
+# explicitly keeps sqlite3 from materializing the rest of the row
+Task = namedtuple('Task', 'id topic context')
+
+# One long-lived connection for the worker's lifetime, opened in main()
+# after the database existence check. WAL mode lets the dashboard's
+# writes proceed while the worker polls.
+CONN = None
+
+def _connect():
+    """Open the worker's persistent database connection"""
+    conn = sqlite3.connect(DATABASE_PATH, isolation_level=None,
+                           check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
     return conn
 
+@contextmanager
+def _txn():
+    """Explicit BEGIN IMMEDIATE ... COMMIT around status updates"""
+    CONN.execute('BEGIN IMMEDIATE')
+    try:
+        yield CONN
+    except Exception:
+        CONN.execute('ROLLBACK')
+        raise
+    else:
+        CONN.execute('COMMIT')
+
+# All category keywords in one compiled alternation; the named group of
+# each hit says which category matched, so categorization is a single
+# C-level scan instead of up to six any()/substring chains
+_CATEGORY_RE = re.compile(
+    r"(?P<smart_contracts>plutus|aiken|marlowe|smart ?contract|contract)"
+    r"|(?P<midnight>midnight|zk|zero[- ]knowledge)"
+    r"|(?P<cardano>cardano|ada|stake pool|node)"
+    r"|(?P<healthcare>healthcare|health|medical)"
+    r"|(?P<competitors>competitor|ethereum|solana|polkadot)"
+    r"|(?P<architecture>architecture|design|system)"
+)
+# Checked in this order so the old if/elif priority is preserved
+_CATEGORY_PRIORITY = ('smart_contracts', 'midnight', 'cardano',
+                      'healthcare', 'competitors', 'architecture')
+
+# Pure function of its arguments, so repeated/re-queued topics skip
+# the keyword sweep entirely
+@functools.lru_cache(maxsize=512)
 def determine_category(topic, context=''):
     """Determine the best category for a topic"""
-    topic_lower = topic.lower()
-    context_lower = context.lower()
-    combined = topic_lower + ' ' + context_lower
-    
-    # Check for specific keywords
-    if any(word in combined for word in ['plutus', 'aiken', 'marlowe', 'smart contract', 'smartcontract', 'contract']):
-        return 'smart_contracts'
-    elif any(word in combined for word in ['midnight', 'zk', 'zero-knowledge', 'zero knowledge', 'zkproof']):
-        return 'midnight'
-    elif any(word in combined for word in ['cardano', 'ada', 'stake pool', 'node']):
-        return 'cardano'
-    elif any(word in combined for word in ['healthcare', 'health', 'medical']):
-        return 'healthcare'
-    elif any(word in combined for word in ['competitor', 'ethereum', 'solana', 'polkadot']):
-        return 'competitors'
-    elif any(word in combined for word in ['architecture', 'design', 'system']):
-        return 'architecture'
-    else:
-        return 'research'
+    # Try the topic alone first - it usually carries the deciding
+    # keyword, and skipping the context avoids lowercasing and scanning
+    # the longer string
+    matched = {m.lastgroup for m in _CATEGORY_RE.finditer(topic.lower())}
+    for category in _CATEGORY_PRIORITY:
+        if category in matched:
+            return category
 
-def move_files_to_category(research_file, doc_file, category):
-    """Move generated files to the correct category folder"""
-    category_dir = KB_DIR / category
-    category_dir.mkdir(exist_ok=True)
-    
-    moved_files = {}
-    
-    # Move research file
-    if research_file and Path(research_file).exists():
-        src = Path(research_file)
-        dst = category_dir / src.name
-        shutil.move(str(src), str(dst))
-        moved_files['research'] = str(dst)
-        print(f"   📁 Moved research to: {category}/{src.name}")
-    
-    # Move documentation file
-    if doc_file and Path(doc_file).exists():
-        src = Path(doc_file)
-        dst = category_dir / src.name
-        shutil.move(str(src), str(dst))
-        moved_files['documentation'] = str(dst)
-        print(f"   📁 Moved documentation to: {category}/{src.name}")
-    
-    return moved_files
+    if context:
+        matched = {m.lastgroup for m in _CATEGORY_RE.finditer(context.lower())}
+        for category in _CATEGORY_PRIORITY:
+            if category in matched:
+                return category
+
+    return 'research'
 
-def process_task(task):
+def process_task(task, orchestrator):
     """Process a single research task"""
     print(f"\n{'='*60}")
-    print(f"Processing task #{task['id']}: {task['topic']}")
+    print(f"Processing task #{task.id}: {task.topic}")
     print(f"{'='*60}\n")
-    
-    conn = get_db()
-    cursor = conn.cursor()
-    
+
     try:
         # Determine category
-        category = determine_category(task['topic'], task['context'] or '')
+        category = determine_category(task.topic, task.context or '')
         print(f"📂 Category: {category}")
-        
+
         # Update status to processing
-        cursor.execute('UPDATE tasks SET status = ? WHERE id = ?', 
-                      ('processing', task['id']))
-        conn.commit()
-        
-        # Initialize orchestrator
-        kb = KnowledgeBase()
-        orchestrator = AgentOrchestrator(kb)
-        
-        # Perform research
+        with _txn():
+            CONN.execute('UPDATE tasks SET status = ? WHERE id = ?',
+                         ('processing', task.id))
+
+        # Perform research; files are written straight into the target
+        # category, so no post-hoc moves are needed
         result = orchestrator.research_and_document(
-            topic=task['topic'],
-            context=task['context'] or '',
+            topic=task.topic,
+            context=task.context or '',
             doc_type='guide',
-            target_audience='developers'
+            target_audience='developers',
+            category=category
         )
-        
-        # Move files to correct category
-        moved = move_files_to_category(
-            result.get('research_file'),
-            result.get('documentation_file'),
-            category
-        )
-        
+
         # Mark as completed
-        cursor.execute('''
-            UPDATE tasks 
-            SET status = ?, completed_at = ? 
-            WHERE id = ?
-        ''', ('completed', datetime.now().isoformat(), task['id']))
-        conn.commit()
-        
-        print(f"\n✅ Task #{task['id']} completed successfully!")
+        with _txn():
+            CONN.execute('''
+                UPDATE tasks
+                SET status = ?, completed_at = ?
+                WHERE id = ?
+            ''', ('completed', datetime.now().isoformat(), task.id))
+
+        print(f"\n✅ Task #{task.id} completed successfully!")
         print(f"   Category: {category}")
-        if moved.get('research'):
-            print(f"   Research: {moved['research']}")
-        if moved.get('documentation'):
-            print(f"   Documentation: {moved['documentation']}")
+        if result.get('research_file'):
+            print(f"   Research: {result['research_file']}")
+        if result.get('documentation_file'):
+            print(f"   Documentation: {result['documentation_file']}")
         
     except Exception as e:
         # Mark as error
         error_msg = str(e)
-        print(f"\n❌ Error processing task #{task['id']}: {error_msg}")
-        
-        cursor.execute('''
-            UPDATE tasks 
-            SET status = ?, error = ? 
-            WHERE id = ?
-        ''', ('error', error_msg, task['id']))
-        conn.commit()
-    
-    finally:
-        conn.close()
+        print(f"\n❌ Error processing task #{task.id}: {error_msg}")
+
+        with _txn():
+            CONN.execute('''
+                UPDATE tasks
+                SET status = ?, error = ?
+                WHERE id = ?
+            ''', ('error', error_msg, task.id))
 
 def main():
     """Main worker loop"""
+    global CONN
+
     print("="*60)
     print("Research Worker Started (with Auto-Categorization)")
     print("="*60)
@@ -149,29 +153,43 @@ def main():
     if not DATABASE_PATH.exists():
         print(f"❌ Database not found: {DATABASE_PATH}")
         sys.exit(1)
-    
+
+    CONN = _connect()
+
+    # Composite index turns the poll query into an index range seek
+    # instead of a full scan + sort every interval
+    CONN.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status_created '
+                 'ON tasks(status, created_at)')
+
+    # Build the knowledge base and agents once for the worker's lifetime
+    # instead of re-scanning and re-initializing per task
+    kb = KnowledgeBase()
+    orchestrator = AgentOrchestrator(kb)
+
     try:
+        idle_wait = CHECK_INTERVAL
         while True:
-            conn = get_db()
-            cursor = conn.cursor()
-            
-            # Get next approved task
-            cursor.execute('''
-                SELECT * FROM tasks 
-                WHERE status = 'approved' 
-                ORDER BY created_at ASC 
-                LIMIT 1
-            ''')
-            
-            task = cursor.fetchone()
-            conn.close()
-            
-            if task:
-                process_task(task)
+            # Drain a batch of approved tasks per poll; each one still
+            # commits its own status updates, preserving crash semantics
+            cursor = CONN.execute('''
+                SELECT id, topic, context FROM tasks
+                WHERE status = 'approved'
+                ORDER BY created_at ASC
+                LIMIT ?
+            ''', (BATCH_SIZE,))
+
+            rows = cursor.fetchall()
+
+            if rows:
+                idle_wait = CHECK_INTERVAL
+                for row in rows:
+                    process_task(Task(*row), orchestrator)
             else:
-                # No tasks, wait
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] No approved tasks. Waiting...", end='\r')
-                time.sleep(CHECK_INTERVAL)
+                # No tasks - back off exponentially (capped) so an idle
+                # worker isn't waking and re-querying every few seconds
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] No approved tasks. Waiting {idle_wait}s...", end='\r')
+                time.sleep(idle_wait)
+                idle_wait = min(idle_wait * 2, MAX_CHECK_INTERVAL)
                 
     except KeyboardInterrupt:
         print("\n\n👋 Worker stopped by user")
@@ -5,60 +5,134 @@ Interactive web interface for managing your knowledge base
 """
 from flask import Flask, render_template, request, jsonify, send_from_directory
 from pathlib import Path
+import functools
+import heapq
+import io
 import os
 import json
+import re
+from collections import Counter
+import time
 from datetime import datetime
 import markdown2
 from kb_agent_system_claude import KnowledgeBase, AgentOrchestrator
 import threading
 import queue
-from typing import List, Dict  # ADD THIS LINE IF MISSING
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional  # ADD THIS LINE IF MISSING
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-change-this'
 
-# Global queue for research tasks
-research_queue = queue.Queue()
+# Serialize API responses with orjson (several times faster than the
+# stdlib encoder on the document/task lists) when it's available
+if orjson is not None:
+    from flask.json.provider import JSONProvider
+
+    class ORJSONProvider(JSONProvider):
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = ORJSONProvider(app)
+
+# Global queue for research tasks. SimpleQueue has a lock-free fast
+# path in CPython; the lock below guards task/result mutations shared
+# with the request threads.
+research_queue = queue.SimpleQueue()
 research_results = {}
+_tasks_lock = threading.Lock()
 
 # Initialize KB
 kb = KnowledgeBase()
 orchestrator = AgentOrchestrator(kb)
 
+# Category (name, description, path) triples computed once at startup;
+# the category set is fixed for the process lifetime, so per-request
+# dict lookups and path joins are pointless
+_CAT_PATHS = [(cat, desc, os.path.join(kb.base_path, cat))
+              for cat, desc in kb.categories.items()]
+
+# slots=True drops the per-instance __dict__, shrinking each task and
+# speeding up the attribute access the endpoints do constantly
+@dataclass(slots=True)
 class ResearchTask:
-    def __init__(self, task_id, topic, context, source_type, source_url, status="pending"):
-        self.task_id = task_id
-        self.topic = topic
-        self.context = context
-        self.source_type = source_type  # 'webpage', 'youtube', 'medium', 'manual'
-        self.source_url = source_url
-        self.status = status  # 'pending', 'approved', 'denied', 'processing', 'completed', 'error'
-        self.created_at = datetime.now()
-        self.result = None
-        self.error = None
-
-# In-memory task storage (use database in production)
-tasks = {}
+    task_id: int
+    topic: str
+    context: str
+    source_type: str  # 'webpage', 'youtube', 'medium', 'manual'
+    source_url: str
+    status: str = "pending"  # 'pending', 'approved', 'denied', 'processing', 'completed', 'error'
+    created_at: datetime = field(default_factory=datetime.now)
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+
+# In-memory task storage (use database in production). Insertion order
+# is creation order, so listings can walk it newest-first with no sort.
+tasks = OrderedDict()
 task_counter = 0
 
+# Short-TTL metadata cache shared by the stat-heavy endpoints; the
+# dashboard re-scans the same files on every refresh, so a 2s window
+# collapses those stats into one. Entries are dropped on delete.
+_META_TTL = 2.0
+_meta_cache = {}  # path -> (cached_at, mtime, size)
+_meta_lock = threading.Lock()
+
+def _file_meta(path, entry=None):
+    """Return (mtime, size) for path, reusing a fresh cache hit"""
+    now = time.monotonic()
+    with _meta_lock:
+        hit = _meta_cache.get(path)
+        if hit is not None and now - hit[0] < _META_TTL:
+            return hit[1], hit[2]
+    st = entry.stat() if entry is not None else os.stat(path)
+    with _meta_lock:
+        _meta_cache[path] = (now, st.st_mtime, st.st_size)
+    return st.st_mtime, st.st_size
+
+def _forget_meta(path):
+    """Invalidate a cached entry after a write or delete"""
+    with _meta_lock:
+        _meta_cache.pop(path, None)
+
 def background_researcher():
     """Background thread to process approved research tasks"""
     while True:
-        try:
-            task_id = research_queue.get(timeout=1)
+        # Block until work arrives, then drain everything pending so a
+        # burst of approvals is handled in one wakeup
+        batch = [research_queue.get()]
+        while True:
+            try:
+                batch.append(research_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        for task_id in batch:
             if task_id not in tasks:
                 continue
-            
+
             task = tasks[task_id]
-            task.status = "processing"
-            
+            with _tasks_lock:
+                task.status = "processing"
+
             try:
                 # Build context with source info
                 full_context = task.context
                 if task.source_url:
                     full_context += f"\n\nSource URL: {task.source_url}"
                     full_context += f"\nSource Type: {task.source_type}"
-                
+
                 # Perform research
                 result = orchestrator.research_and_document(
                     topic=task.topic,
@@ -66,20 +140,17 @@ def background_researcher():
                     doc_type="guide",
                     target_audience="developers"
                 )
-                
-                task.result = result
-                task.status = "completed"
-                research_results[task_id] = result
-                
+
+                with _tasks_lock:
+                    task.result = result
+                    task.status = "completed"
+                    research_results[task_id] = result
+
             except Exception as e:
-                task.error = str(e)
-                task.status = "error"
+                with _tasks_lock:
+                    task.error = str(e)
+                    task.status = "error"
                 print(f"[Background] Error processing task {task_id}: {e}")
-                
-        except queue.Empty:
-            continue
-        except Exception as e:
-            print(f"[Background] Researcher error: {e}")
 
 # Start background thread
 researcher_thread = threading.Thread(target=background_researcher, daemon=True)
@@ -90,26 +161,45 @@ def index():
     """Main dashboard page"""
     return render_template('dashboard.html')
 
+def _scan_category(cat_entry):
+    """Count and size one category's docs; runs on the stats pool.
+
+    One scandir pass per category - DirEntry.stat() is cached from the
+    directory read, so each file costs a single stat at most. Count is
+    None when the directory doesn't exist.
+    """
+    category, desc, cat_path = cat_entry
+    count = 0
+    size = 0
+    try:
+        with os.scandir(cat_path) as entries:
+            for entry in entries:
+                if entry.name.endswith('.md') and entry.is_file(follow_symlinks=False):
+                    count += 1
+                    size += _file_meta(entry.path, entry)[1]
+    except FileNotFoundError:
+        return category, desc, None, 0
+    return category, desc, count, size
+
 @app.route('/api/stats')
 def api_stats():
     """Get knowledge base statistics"""
     categories = {}
     total = 0
     total_size = 0
-    
-    for category in kb.categories.keys():
-        cat_path = os.path.join(kb.base_path, category)
-        if os.path.exists(cat_path):
-            files = [f for f in os.listdir(cat_path) if f.endswith('.md')]
-            count = len(files)
+
+    # Scan categories in parallel - the scandir/stat syscalls release
+    # the GIL, so the per-category passes overlap
+    with ThreadPoolExecutor(max_workers=min(8, len(_CAT_PATHS))) as executor:
+        for category, desc, count, size in executor.map(_scan_category, _CAT_PATHS):
+            if count is None:
+                continue
             categories[category] = {
                 'count': count,
-                'description': kb.categories[category]
+                'description': desc
             }
             total += count
-            
-            for f in files:
-                total_size += os.path.getsize(os.path.join(cat_path, f))
+            total_size += size
     
     return jsonify({
         'total_documents': total,
@@ -118,32 +208,55 @@ def api_stats():
         'last_updated': datetime.now().isoformat()
     })
 
+def _iter_md(path):
+    """Yield (path, name, mtime, size) for markdown docs under path.
+
+    Recursive scandir reuses the DirEntry stat cached from the
+    directory read, so each file costs one stat at most.
+    """
+    try:
+        entries = os.scandir(path)
+    except FileNotFoundError:
+        return  # unknown category or directory removed mid-scan
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_md(entry.path)
+            elif entry.name.endswith('.md') and entry.name != 'INDEX.md':
+                mtime, size = _file_meta(entry.path, entry)
+                yield entry.path, entry.name, mtime, size
+
 @app.route('/api/recent')
 def api_recent():
     """Get recent documents"""
     category = request.args.get('category')
     limit = int(request.args.get('limit', 10))
-    
+
     search_path = os.path.join(kb.base_path, category) if category else kb.base_path
-    
-    files = []
-    for root, dirs, filenames in os.walk(search_path):
-        for f in filenames:
-            if f.endswith('.md') and f != 'INDEX.md':
-                filepath = Path(root) / f
-                files.append({
-                    'path': str(filepath),
-                    'relative_path': str(filepath.relative_to(kb.base_path)),
-                    'name': f,
-                    'modified': filepath.stat().st_mtime,
-                    'size': filepath.stat().st_size
-                })
-    
-    files.sort(key=lambda x: x['modified'], reverse=True)
-    
+    base = str(kb.base_path)
+
+    # Count during traversal and keep only the newest `limit` entries -
+    # O(N log limit) and no full list retained; response dicts are only
+    # built for the winners
+    total = 0
+
+    def entries():
+        nonlocal total
+        for item in _iter_md(search_path):
+            total += 1
+            yield item
+
+    newest = heapq.nlargest(limit, entries(), key=lambda item: item[2])
+
     return jsonify({
-        'documents': files[:limit],
-        'total': len(files)
+        'documents': [{
+            'path': path,
+            'relative_path': os.path.relpath(path, base),
+            'name': name,
+            'modified': mtime,
+            'size': size
+        } for path, name, mtime, size in newest],
+        'total': total
     })
 
 @app.route('/api/document/<path:doc_path>', methods=['DELETE'])
@@ -155,9 +268,11 @@ def api_delete_document(doc_path):
         return jsonify({'error': 'Document not found'}), 404
     
     try:
-        # Delete the file
+        # Delete the file and forget it everywhere it's tracked
         os.remove(filepath)
-        
+        _forget_meta(filepath)
+        kb.remove_documents([filepath])
+
         # Regenerate index
         orchestrator.maintainer_agent.create_index()
         
@@ -177,19 +292,24 @@ def api_bulk_delete():
     deleted = []
     errors = []
     
+    # Attempt the unlink directly and handle ENOENT - one syscall per
+    # successful delete instead of an exists() stat followed by remove
+    deleted_paths = []
     for doc_path in paths:
         filepath = os.path.join(kb.base_path, doc_path)
         try:
-            if os.path.exists(filepath):
-                os.remove(filepath)
-                deleted.append(doc_path)
-            else:
-                errors.append(f"{doc_path}: Not found")
-        except Exception as e:
+            os.unlink(filepath)
+            _forget_meta(filepath)
+            deleted.append(doc_path)
+            deleted_paths.append(filepath)
+        except FileNotFoundError:
+            errors.append(f"{doc_path}: Not found")
+        except OSError as e:
             errors.append(f"{doc_path}: {str(e)}")
-    
+
     # Regenerate index
     if deleted:
+        kb.remove_documents(deleted_paths)
         orchestrator.maintainer_agent.create_index()
     
     return jsonify({
@@ -208,28 +328,30 @@ def api_cleanup_errors():
     if not confirm:
         return jsonify({'error': 'Confirmation required'}), 400
     
-    error_files = []
-    
-    # Find all error documents
-    for root, dirs, files in os.walk(kb.base_path):
-        for file in files:
-            if 'error' in file.lower() or 'Error' in file:
-                filepath = os.path.join(root, file)
-                error_files.append(filepath)
-    
-    # Delete them
+    # Single scandir traversal that unlinks matches as it finds them -
+    # no collected list and no second pass. The lowercase test already
+    # covers both casings the old code checked separately.
     deleted = []
-    for filepath in error_files:
-        try:
-            os.remove(filepath)
-            deleted.append(filepath)
-        except Exception as e:
-            print(f"Error deleting {filepath}: {e}")
+    stack = [str(kb.base_path)]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.md') and 'error' in entry.name.lower():
+                    try:
+                        os.unlink(entry.path)
+                        _forget_meta(entry.path)
+                        deleted.append(entry.path)
+                    except OSError as e:
+                        print(f"Error deleting {entry.path}: {e}")
     
     # Regenerate index
     if deleted:
+        kb.remove_documents(deleted)
         orchestrator.maintainer_agent.create_index()
-    
+
     return jsonify({
         'success': True,
         'deleted': len(deleted),
@@ -250,12 +372,15 @@ def api_search():
     docs = []
     for filepath in results[:20]:  # Limit to 20 results
         try:
-            with open(filepath, 'r') as f:
-                content = f.read()
-                # Extract first few lines as preview
-                lines = content.split('\n')
-                preview = '\n'.join(lines[:5])
-            
+            # A 5-line preview never needs more than the first 4 KiB,
+            # so read exactly that instead of the whole document
+            fd = os.open(filepath, os.O_RDONLY)
+            try:
+                head = os.read(fd, 4096).decode('utf-8', 'replace')
+            finally:
+                os.close(fd)
+            preview = '\n'.join(head.split('\n', 6)[:5])
+
             docs.append({
                 'path': filepath,
                 'relative_path': str(Path(filepath).relative_to(kb.base_path)),
@@ -270,78 +395,124 @@ def api_search():
         'total': len(results)
     })
 
+@functools.lru_cache(maxsize=256)
+def _render_document(filepath, mtime_ns, size):
+    """Read and markdown-render a document.
+
+    Keyed by (path, mtime, size), so an unchanged file renders once no
+    matter how often the dashboard navigates back to it.
+    """
+    with open(filepath, 'r') as f:
+        content = f.read()
+    # Only ask markdown2 to parse frontmatter when the document can
+    # actually have any - the extra costs a parse pass per render
+    extras = ['fenced-code-blocks', 'tables']
+    if content.startswith('---\n'):
+        extras.append('metadata')
+    html = markdown2.markdown(content, extras=extras)
+    return content, html
+
 @app.route('/api/document/<path:doc_path>')
 def api_document(doc_path):
     """Get document content"""
+    # Raw markdown wants no rendering or JSON wrapping at all - let the
+    # server push the file (sendfile from page cache where supported)
+    if request.args.get('raw'):
+        return send_from_directory(kb.base_path, doc_path,
+                                   mimetype='text/markdown')
+
     filepath = os.path.join(kb.base_path, doc_path)
-    
-    if not os.path.exists(filepath):
+
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
         return jsonify({'error': 'Document not found'}), 404
-    
+
+    # Rendering dominates this endpoint, so let unchanged documents
+    # short-circuit to 304 before any read happens
+    etag = f"{int(st.st_mtime_ns):x}-{st.st_size:x}"
+    if request.headers.get('If-None-Match') == etag:
+        return '', 304
+
     try:
-        with open(filepath, 'r') as f:
-            content = f.read()
-        
-        # Convert markdown to HTML
-        html = markdown2.markdown(content, extras=['fenced-code-blocks', 'tables', 'metadata'])
-        
-        return jsonify({
+        content, html = _render_document(filepath, st.st_mtime_ns, st.st_size)
+
+        response = jsonify({
             'path': doc_path,
             'content': content,
             'html': html,
             'metadata': html.metadata if hasattr(html, 'metadata') else {}
         })
+        response.headers['ETag'] = etag
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def synthesize_documentation(self, research_files: List[str], 
+# Frontmatter block at the head of a research file, grabbed in one
+# match instead of splitting the content into a line list
+_FM = re.compile(r'^---\n(.*?)\n---\n', re.DOTALL)
+
+# Timestamp prefix on generated filenames ("20240101_120000 Topic"),
+# stripped in one match with no intermediate strings
+_TS_PREFIX = re.compile(r'^[\d_]+\s+(.+)$')
+
+def synthesize_documentation(self, research_files: List[str],
                               doc_type: str = "guide",
                               target_audience: str = "developers") -> Dict:
     """Take raw research and create polished documentation using Claude"""
     print(f"[{self.name}] Synthesizing documentation from {len(research_files)} sources")
     
     try:
-        # Read all research files
-        research_content = []
+        # Stream sources into one bounded buffer instead of keeping a
+        # list of whole-file strings plus the joined copy; the cap also
+        # keeps the prompt within a sane size for the model
+        MAX_RESEARCH_CHARS = 400_000
+        buf = io.StringIO()
+        total = 0
         topic = ""  # Extract topic from research
         context = ""
         source_url = ""
-        
+
         for file_path in research_files:
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    research_content.append(f"## Source: {file_path}\n\n{content}\n\n")
-                    
-                    # Try to extract metadata from first file
+                    content = f.read(MAX_RESEARCH_CHARS - total)
+
+                buf.write(f"## Source: {file_path}\n\n")
+                buf.write(content)
+                buf.write("\n\n")
+                total += len(content)
+
+                # Try to extract metadata from first file
+                if not topic:
+                    fm = _FM.match(content)
+                    if fm:
+                        try:
+                            metadata = json.loads(fm.group(1))
+                            topic = metadata.get('title', '')
+                        except:
+                            pass
+
+                    # Extract topic from filename if not in metadata
                     if not topic:
-                        import json
-                        lines = content.split('\n')
-                        if lines[0] == '---' and '---' in lines[1:]:
-                            end_idx = lines[1:].index('---') + 1
-                            try:
-                                metadata = json.loads('\n'.join(lines[1:end_idx]))
-                                topic = metadata.get('title', '')
-                            except:
-                                pass
-                        
-                        # Extract topic from filename if not in metadata
-                        if not topic:
-                            import os
-                            filename = os.path.basename(file_path)
-                            topic = filename.replace('.md', '').replace('_', ' ')
-                            # Remove timestamp prefix
-                            parts = topic.split(' ', 1)
-                            if len(parts) > 1 and parts[0].replace('_', '').isdigit():
-                                topic = parts[1]
-                    
+                        filename = os.path.basename(file_path)
+                        topic = filename.replace('.md', '').replace('_', ' ')
+                        # Remove timestamp prefix
+                        m = _TS_PREFIX.match(topic)
+                        if m:
+                            topic = m.group(1)
+
+                if total >= MAX_RESEARCH_CHARS:
+                    print(f"[{self.name}] Research cap reached; truncating remaining sources")
+                    break
+
             except Exception as e:
                 print(f"[{self.name}] Warning: Could not read {file_path}: {e}")
-        
-        if not research_content:
+
+        if total == 0:
             raise ValueError("No research content available to synthesize")
-        
-        combined_research = "\n".join(research_content)
+
+        combined_research = buf.getvalue()
         
         # **NEW: Detect category smartly**
         category = self._detect_category(topic, combined_research[:500], source_url)
@@ -393,21 +564,20 @@ Format the output in clean Markdown."""
 @app.route('/api/tasks', methods=['GET'])
 def api_get_tasks():
     """Get all research tasks"""
-    task_list = []
-    for task_id, task in tasks.items():
-        task_list.append({
-            'id': task.task_id,
-            'topic': task.topic,
-            'context': task.context,
-            'source_type': task.source_type,
-            'source_url': task.source_url,
-            'status': task.status,
-            'created_at': task.created_at.isoformat(),
-            'result': task.result,
-            'error': task.error
-        })
-    
-    task_list.sort(key=lambda x: x['created_at'], reverse=True)
+    # Tasks are stored in creation order, so newest-first is just a
+    # reversed walk - no sort, no key extraction
+    task_list = [{
+        'id': task.task_id,
+        'topic': task.topic,
+        'context': task.context,
+        'source_type': task.source_type,
+        'source_url': task.source_url,
+        'status': task.status,
+        'created_at': task.created_at.isoformat(),
+        'result': task.result,
+        'error': task.error
+    } for task in reversed(tasks.values())]
+
     return jsonify({'tasks': task_list})
 
 @app.route('/api/tasks', methods=['POST'])
@@ -504,86 +674,69 @@ if __name__ == '__main__':
     print("\n📊 Starting server...")
     print("🔗 Open your browser to: http://localhost:5000")
     print("\n⚠️  Press Ctrl+C to stop\n")
-    
-    app.run(debug=True, host='0.0.0.0', port=5000)
+
+    if os.environ.get('DEV'):
+        app.run(debug=True, host='0.0.0.0', port=5000)
+    else:
+        try:
+            # Threaded WSGI server so the IO-heavy endpoints overlap
+            # instead of serializing behind the Werkzeug dev server
+            from waitress import serve
+        except ImportError:
+            app.run(debug=True, host='0.0.0.0', port=5000)
+        else:
+            serve(app, host='0.0.0.0', port=5000, threads=8)
+
+# Every category keyword in one compiled alternation (longer variants
+# first so they win at a shared prefix); a single scan tallies hits per
+# category instead of a count() pass per keyword
+_CATEGORY_WEIGHT_RE = re.compile(
+    r"(?P<cardano>docs\.cardano\.org|cardano\.org|cardano|ada|plutus"
+    r"|stake pool|catalyst|daedalus|yoroi|shelley|voltaire|goguen)"
+    r"|(?P<midnight>midnight network|midnight\.network|midnight|dust"
+    r"|compact|privacy blockchain)"
+    r"|(?P<healthcare>healthcare|health|medical|patient|hipaa|fhir|hl7"
+    r"|ehr|emr|clinical|hospital|doctor|pharma|drug|diagnosis)"
+    r"|(?P<zkproofs>zero knowledge|zero-knowledge|zk-snark|zk-stark"
+    r"|zk-proof|zkp|proof system|cryptographic proof|privacy proof)"
+    r"|(?P<smart_contracts>smart contract|solidity|vyper|contract|dapp"
+    r"|decentralized app|on-chain)"
+    r"|(?P<architecture>architecture|design pattern|system design"
+    r"|infrastructure|scalability|distributed system|consensus|protocol)"
+    r"|(?P<competitors>ethereum|polkadot|cosmos|avalanche|solana"
+    r"|algorand|near|comparison|vs)"
+)
+
+# Generic blockchain words for the no-match fallback, checked by word
+# intersection rather than a substring scan per keyword
+_BLOCKCHAIN = frozenset({'blockchain', 'crypto', 'token', 'wallet'})
+
 
 class DocumentationWriterAgent:
     """Agent responsible for creating clean documentation with Claude"""
-    
+
     def __init__(self, knowledge_base: KnowledgeBase):
         self.kb = knowledge_base
         self.name = "Documentation Writer"
-    
+
     def _detect_category(self, topic: str, context: str, source_url: str) -> str:
         """
         Smart category detection based on content analysis
         """
         # Combine all text for analysis
         combined_text = f"{topic} {context} {source_url}".lower()
-        
-        # Category keywords with weights
-        category_patterns = {
-            'cardano': {
-                'keywords': ['cardano', 'ada', 'plutus', 'stake pool', 'catalyst', 
-                            'daedalus', 'yoroi', 'shelley', 'voltaire', 'goguen',
-                            'docs.cardano.org', 'cardano.org'],
-                'weight': 0
-            },
-            'midnight': {
-                'keywords': ['midnight', 'midnight network', 'dust', 'compact',
-                            'midnight.network', 'privacy blockchain'],
-                'weight': 0
-            },
-            'healthcare': {
-                'keywords': ['healthcare', 'health', 'medical', 'patient', 'hipaa',
-                            'fhir', 'hl7', 'ehr', 'emr', 'clinical', 'hospital',
-                            'doctor', 'pharma', 'drug', 'diagnosis'],
-                'weight': 0
-            },
-            'zkproofs': {
-                'keywords': ['zero knowledge', 'zk-proof', 'zkp', 'zk-snark', 
-                            'zk-stark', 'zero-knowledge', 'proof system',
-                            'cryptographic proof', 'privacy proof'],
-                'weight': 0
-            },
-            'smart_contracts': {
-                'keywords': ['smart contract', 'solidity', 'vyper', 'contract',
-                            'dapp', 'decentralized app', 'on-chain'],
-                'weight': 0
-            },
-            'architecture': {
-                'keywords': ['architecture', 'design pattern', 'system design',
-                            'infrastructure', 'scalability', 'distributed system',
-                            'consensus', 'protocol'],
-                'weight': 0
-            },
-            'competitors': {
-                'keywords': ['ethereum', 'polkadot', 'cosmos', 'avalanche',
-                            'solana', 'algorand', 'near', 'comparison', 'vs'],
-                'weight': 0
-            }
-        }
-        
-        # Calculate weights for each category
-        for category, data in category_patterns.items():
-            for keyword in data['keywords']:
-                if keyword in combined_text:
-                    # Weight increases based on keyword match
-                    data['weight'] += combined_text.count(keyword)
-        
+
+        # One linear pass over the text collects every keyword hit
+        weights = Counter(
+            m.lastgroup for m in _CATEGORY_WEIGHT_RE.finditer(combined_text))
+
         # Find category with highest weight
-        max_weight = 0
-        best_category = 'research'  # Default fallback
-        
-        for category, data in category_patterns.items():
-            if data['weight'] > max_weight:
-                max_weight = data['weight']
-                best_category = category
-        
+        best_category, max_weight = max(
+            weights.items(), key=itemgetter(1), default=('research', 0))
+
         # If no strong match, use 'midnight' as default for blockchain topics
-        if max_weight == 0:
-            if any(word in combined_text for word in ['blockchain', 'crypto', 'token', 'wallet']):
-                best_category = 'midnight'
-        
+        if max_weight == 0 and _BLOCKCHAIN & set(combined_text.split()):
+            best_category = 'midnight'
+
         print(f"[{self.name}] Category detection: '{best_category}' (confidence: {max_weight})")
         return best_category
\ No newline at end of file